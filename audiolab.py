@@ -7,45 +7,46 @@ def mix(sound1, sound2, p):
     if sound1['rate'] != sound2['rate']:
         return None
     else:
-        out = []
-        if len(sound1['samples']) <= len(sound2['samples']):
-            for i in range(len(sound1['samples'])):
-                out.append(sound1['samples'][i]*p + sound2['samples'][i]*(1-p))
-        else:
-            for i in range(len(sound2['samples'])):
-                out.append(sound1['samples'][i]*p + sound2['samples'][i]*(1-p))
+        # zip stops at the end of the shorter sound
+        q = 1-p
+        out = [ s1*p + s2*q for s1, s2 in zip(sound1['samples'], sound2['samples']) ]
         return { 'rate': sound1['rate'], 'samples': out }
 
 
 def echo(sound, num_echoes, delay, scale):
-    sample_delay, samples, x = round(delay * sound['rate']), sound['samples'], 1
-    echo = [0]*(len(samples)+(num_echoes*sample_delay))
-    for i in range(len(samples)):
-        echo[i] = samples[i]
-    for i in range(1, num_echoes+1):
+    sample_delay, samples = round(delay * sound['rate']), sound['samples']
+    n = len(samples)
+    # gain of each echo, scale**1 .. scale**num_echoes
+    gains = [ scale**i for i in range(1, num_echoes+1) ]
+    if sample_delay >= n:
+        # echoes never overlap: write each output sample exactly once, as
+        # the sound, a silent gap, the next scaled copy, and so on
+        echo, gap = list(samples), [0]*(sample_delay-n)
+        for gain in gains:
+            echo.extend(gap)
+            echo.extend([ gain*s for s in samples ])
+        return { 'rate': sound['rate'], 'samples': echo }
+    echo = samples + [0]*(num_echoes*sample_delay)
+    for i, gain in enumerate(gains, 1):
+        # add the i-th scaled copy onto the slice it overlaps
         pos = i*sample_delay
-        for s in samples:
-            echo[pos] += (scale**x)*s
-            pos += 1
-        x += 1
+        echo[pos:pos+n] = [ e + gain*s for e, s in zip(echo[pos:pos+n], samples) ]
     return { 'rate': sound['rate'], 'samples': echo }
         
             
 
 
 def pan(sound):
-    l, r, x, n = [], [], 0.0, len(sound['left'])
-    for i in range(n):
-        r.append(sound['right'][i]*(x/(n-1)))
-        l.append(sound['left'][i]*(1-x/(n-1)))
-        x += 1.0
+    n = len(sound['left'])
+    # right channel ramps up from 0 to 1 while the left ramps down from 1 to 0
+    ramp = [ x/(n-1) for x in range(n) ]
+    r = [ s*f for s, f in zip(sound['right'], ramp) ]
+    l = [ s*(1-f) for s, f in zip(sound['left'], ramp) ]
     return { 'rate': sound['rate'], 'left': l, 'right': r }
 
 
 def remove_vocals(sound):
-    mono = []
-    for i in range(len(sound['left'])):
-        mono.append(sound['left'][i] - sound['right'][i])
+    mono = [ l - r for l, r in zip(sound['left'], sound['right']) ]
     return { 'rate': sound['rate'], 'samples': mono }
     
 
@@ -70,34 +71,26 @@ def load_wav(filename, stereo=False):
 
     out = {"rate": sr}
 
+    # decode every frame in one read + unpack
+    data = struct.unpack("<%dh" % (count * chan), f.readframes(count))
+    # 1/2**15 is a power of two, so multiplying is exact (same as dividing)
+    scale = 1 / (2**15)
+
     if stereo:
-        left = []
-        right = []
-        for i in range(count):
-            frame = f.readframes(1)
-            if chan == 2:
-                left.append(struct.unpack("<h", frame[:2])[0])
-                right.append(struct.unpack("<h", frame[2:])[0])
-            else:
-                datum = struct.unpack("<h", frame)[0]
-                left.append(datum)
-                right.append(datum)
-
-        out["left"] = [i / (2**15) for i in left]
-        out["right"] = [i / (2**15) for i in right]
+        if chan == 2:
+            left, right = data[0::2], data[1::2]
+        else:
+            left = right = data
+
+        out["left"] = [i * scale for i in left]
+        out["right"] = [i * scale for i in right]
     else:
-        samples = []
-        for i in range(count):
-            frame = f.readframes(1)
-            if chan == 2:
-                left = struct.unpack("<h", frame[:2])[0]
-                right = struct.unpack("<h", frame[2:])[0]
-                samples.append((left + right) / 2)
-            else:
-                datum = struct.unpack("<h", frame)[0]
-                samples.append(datum)
-
-        out["samples"] = [i / (2**15) for i in samples]
+        if chan == 2:
+            samples = [(l + r) / 2 for l, r in zip(data[0::2], data[1::2])]
+        else:
+            samples = data
+
+        out["samples"] = [i * scale for i in samples]
 
     return out
 
@@ -117,14 +110,14 @@ def write_wav(sound, filename):
     else:
         # stereo
         outfile.setparams((2, 2, sound["rate"], 0, "NONE", "not compressed"))
-        out = []
-        for l, r in zip(sound["left"], sound["right"]):
-            l = int(max(-1, min(1, l)) * (2**15 - 1))
-            r = int(max(-1, min(1, r)) * (2**15 - 1))
-            out.append(l)
-            out.append(r)
-
-    outfile.writeframes(b"".join(struct.pack("<h", frame) for frame in out))
+        out = [
+            int(max(-1, min(1, v)) * (2**15 - 1))
+            for frame in zip(sound["left"], sound["right"])
+            for v in frame
+        ]
+
+    # encode every frame with one struct.pack and a single write
+    outfile.writeframes(struct.pack("<%dh" % len(out), *out))
     outfile.close()
 
 
@@ -1,127 +1,119 @@
 #!/usr/bin/env python3
 
 import pickle
+from collections import deque
 
 
 def transform_data(raw_data):
-   # create dicts of actor id: {set of costars} and movie id: {set of actors}
-   actors, movies = { }, { }
-   for t in raw_data:
+    # create dicts of actor id: {set of costars} and movie id: {set of actors}
+    actors, movies = { }, { }
+    for a1, a2, m in raw_data:
         # add/update every actor-costar pair to actor dict
-        if t[0] in actors and t[1] in actors:
-            actors[t[0]].add(t[1])
-            actors[t[1]].add(t[0])
-        elif t[0] in actors and t[1] not in actors:
-            actors[t[0]].add(t[1])
-            actors[t[1]] = {t[0]} 
-        elif t[0] not in actors and t[1] in actors:
-            actors[t[0]] = {t[1]}
-            actors[t[1]].add(t[0])
-        else:
-            actors[t[0]] = {t[1]}
-            actors[t[1]] = {t[0]}
+        actors.setdefault(a1, set()).add(a2)
+        actors.setdefault(a2, set()).add(a1)
         # add/update every pair of actors to movie dict
-        if t[2] in movies:
-            movies[t[2]].update({t[0], t[1]})
-        else:
-            movies[t[2]] = {t[0], t[1]}
-   # return data: tuple of two dicts
-   return actors, movies
+        movies.setdefault(m, set()).update((a1, a2))
+    # return data: tuple of two dicts
+    return actors, movies
     
 
 def acted_together(transformed_data, actor_id_1, actor_id_2):
-    if actor_id_1 == actor_id_2:
-        return True
-    else:
-        # containment check for 2nd actor in 1st actor's set of costars
-        if actor_id_2 in transformed_data[0][actor_id_1]:
-            return True
-        else:
-            return False
+    # containment check for 2nd actor in 1st actor's set of costars
+    return actor_id_1 == actor_id_2 or actor_id_2 in transformed_data[0].get(actor_id_1, ())
 
 def actors_with_bacon_number(transformed_data, n):
-    assigned, bacon = {4724}, set()
-    # base case
-    if n == 0:
-        return assigned
-    else:
-        # loop until bacon number = n
-        for i in range(1, n+1):
-            # actors w/ bacon num i = costars of actors w/ assigned bacon nums
-            # that have not been assigned bacon num
-            bacon = { x for p in assigned for x in transformed_data[0] if acted_together(transformed_data, x, p) \
-                      and x not in assigned }
-            # update visited actors w current bacon set
-            assigned.update(bacon)
-            # break loop if no more bacon sets can be found
-            if bacon == set():
-                break
-        return bacon
+    assigned, bacon = {4724}, {4724}
+    # loop until bacon number = n
+    for i in range(n):
+        # actors w/ bacon num i+1 = costars of actors w/ bacon num i
+        # that have not been assigned bacon num
+        bacon = { x for p in bacon for x in transformed_data[0].get(p, ()) } - assigned
+        # update visited actors w current bacon set
+        assigned.update(bacon)
+        # break loop if no more bacon sets can be found
+        if not bacon:
+            break
+    return bacon
             
 
 # Helper function for path-finding
-def get_path(queue, visited, target, transformed_data):
-    while queue:
-        # remove 1st path in queue
-        this_path = queue.pop(0)
-        # check for target id, return path
-        if target in transformed_data[0][this_path[-1]]:
-            this_path.append(target)
-            return this_path
+def get_path(source, target, transformed_data):
+    if source == target:
+        return [source]
+    # bidirectional BFS: parent pointers + current frontier from each end
+    parents_fwd, parents_bwd = {source: None}, {target: None}
+    frontier_fwd, frontier_bwd = {source}, {target}
+    while frontier_fwd and frontier_bwd:
+        # expand whichever frontier is smaller by one full level
+        if len(frontier_fwd) <= len(frontier_bwd):
+            frontier, parents, other = frontier_fwd, parents_fwd, parents_bwd
+        else:
+            frontier, parents, other = frontier_bwd, parents_bwd, parents_fwd
+        next_frontier = set()
+        for a in frontier:
+            for c in transformed_data[0].get(a, ()):
+                if c not in parents:
+                    parents[c] = a
+                    # frontiers met, stitch both halves of the path together
+                    if c in other:
+                        return join_paths(parents_fwd, parents_bwd, c)
+                    next_frontier.add(c)
+        if parents is parents_fwd:
+            frontier_fwd = next_frontier
         else:
-            # each new path = current path extended by id of each costar of last
-            # actor in current path (if not visited)
-            new_paths = [ this_path+[c] for c in transformed_data[0][this_path[-1]] \
-                         if c not in visited ]
-            queue.extend(new_paths)
-            # add costars of last actor in current path to visited
-            visited.update(transformed_data[0][this_path[-1]])
+            frontier_bwd = next_frontier
     # no path found
     return None
+
+
+def trace_path(parents, node):
+    # follow parent pointers from node back to the root of its search
+    path = []
+    while node is not None:
+        path.append(node)
+        node = parents[node]
+    return path
+
+
+def join_paths(parents_fwd, parents_bwd, meet):
+    # source -> meeting actor (reversed), then meeting actor -> target
+    path = trace_path(parents_fwd, meet)
+    path.reverse()
+    path.extend(trace_path(parents_bwd, parents_bwd[meet]))
+    return path
         
         
 def bacon_path(transformed_data, actor_id):
-    # work queue of paths, set of visited actors
-    queue, visited = [[4724]], {4724}
-    return get_path(queue, visited, actor_id, transformed_data)
+    return get_path(4724, actor_id, transformed_data)
             
         
 def actor_to_actor_path(transformed_data, actor_id_1, actor_id_2):
-    queue, visited = [[actor_id_1]], {actor_id_1}
-    if actor_id_1 == actor_id_2:
-        return queue[0]
-    else:
-        return get_path(queue, visited, actor_id_2, transformed_data)
+    return get_path(actor_id_1, actor_id_2, transformed_data)
 
 
 def actor_path(transformed_data, actor_id_1, goal_test_function):
     if goal_test_function(actor_id_1):
         return [actor_id_1]
-    else:
-        # path queue
-        paths = []
-        # add paths from actor 1 to each valid actor to queue
-        for a in transformed_data[0]:
-            if goal_test_function(a):
-                paths.append(actor_to_actor_path(transformed_data, actor_id_1, a))
-        # check for empty queue, return shortest path
-        if paths:
-            shortest = paths[0]
-            for p in paths:
-                if len(p) < len(shortest):
-                    shortest = p
-            return shortest
-        else:
-            return None
+    # single BFS from actor 1, first actor to pass the goal test is closest
+    queue, parents = deque([actor_id_1]), {actor_id_1: None}
+    while queue:
+        a = queue.popleft()
+        for c in transformed_data[0].get(a, ()):
+            if c not in parents:
+                parents[c] = a
+                if goal_test_function(c):
+                    path = trace_path(parents, c)
+                    path.reverse()
+                    return path
+                queue.append(c)
+    # no valid actor reachable
+    return None
         
 
 
 def actors_connecting_films(transformed_data, film1, film2):
-    def goal_function(actor):
-        if actor in transformed_data[1][film2]:
-            return True
-        else:
-            return False
+    # bound membership test on film 2's cast, no per-call dict lookups
+    goal_function = transformed_data[1][film2].__contains__
     if film1 == film2:
         return [transformed_data[1][film1]][0]
     else:
@@ -1,12 +1,13 @@
 #!/usr/bin/env python3
 
 import math
+import functools
 from PIL import Image
 
 
 def get_pixel(image, x, y, boundary_behavior = 'None'):
     width, height = image['width'], image['height']
-    if x in range(width) and y in range(height):
+    if 0 <= x < width and 0 <= y < height:
         return image['pixels'][y*image['width']+x]
     else:
         x1, y1 = x, y
@@ -60,30 +61,48 @@ def apply_per_pixel(image, func):
 def inverted(image):
     return apply_per_pixel(image, lambda c: 255-c)
 
-def create_matrix(image, deg, x, y, boundary_behavior):
+def boundary_indices(n, step, boundary_behavior):
     """
-    Constructs nxn matrix, n = degree of correlation kernel, centered at x, y. 
-    Fills matrix with values from original input image, unless index is out of 
-    scope; then get_pixel is applied with chosen boundary_behavior
-    
-    Does not mutate input image, and returns pixel matrix as a list of ints.
-
-    """
-    # Defining step as max dist away from center
-    pix, i, step = [0]*(deg**2), 0, deg//2
-    # Moving vertically from center
-    for h in range(y-step, y+step+1):
-        # Moving horizontally from center
-        for w in range(x-step, x+step+1):
-            pix[i] = get_pixel(image, w, h, boundary_behavior)
-            i += 1
-    return pix   
+    Maps every coordinate in range(-step, n+step) along an axis of length n
+    to the in-bounds coordinate it should read from under boundary_behavior,
+    or None where the pixel should be treated as zero.
+
+    Returns the lookup table as a list indexed by coordinate+step.
+    """
+    if boundary_behavior == 'zero':
+        return [ i if 0 <= i < n else None for i in range(-step, n+step) ]
+    elif boundary_behavior == 'extend':
+        return [ min(max(i, 0), n-1) for i in range(-step, n+step) ]
+    else:
+        return [ i % n for i in range(-step, n+step) ]
+
+def pad_image(image, step, boundary_behavior):
+    """
+    Builds the pixel list of the input image padded by step pixels on every
+    side, filling the border according to boundary_behavior so that a kernel
+    can be slid over it without any per-pixel bounds checks.
+
+    Does not mutate input image. Returns the padded pixels as a flat list, or
+    None if boundary_behavior is not recognized.
+    """
+    if boundary_behavior not in ('zero', 'extend', 'wrap'):
+        return None
+    width, pixels = image['width'], image['pixels']
+    xidx = boundary_indices(width, step, boundary_behavior)
+    yidx = boundary_indices(image['height'], step, boundary_behavior)
+    padded = []
+    for y in yidx:
+        if y is None:
+            padded.extend([0]*len(xidx))
+        else:
+            row = y*width
+            padded.extend(0 if x is None else pixels[row+x] for x in xidx)
+    return padded
     
+@functools.lru_cache(maxsize=16)
 def create_box(n):
-    kernel = [0]*(n**2)
-    for i in range(len(kernel)):
-        kernel[i] = 1/len(kernel)
-    return kernel
+    # immutable so the cached kernel can be shared between filters
+    return (1/(n**2),)*(n**2)
    
 def round_and_clip_image(image):
     """
@@ -113,17 +132,25 @@ def edges(image):
     Does not mutate input image, but creates a separate structure to 
     represent the sharpened output.
     """
-    output = { 
+    # both 3x3 Sobel kernels are applied in a single pass over the padded
+    # image: kx = [-1, 0, 1, -2, 0, 2, -1, 0, 1], ky = [-1, -2, -1, 0, 0, 0, 1, 2, 1]
+    width, pw = image['width'], image['width']+2
+    padded, sqrt, pixels = pad_image(image, 1, 'extend'), math.sqrt, []
+    for start in range(0, image['height']*pw, pw):
+        top = padded[start:start+pw]
+        mid = padded[start+pw:start+2*pw]
+        bot = padded[start+2*pw:start+3*pw]
+        for tl, t, tr, l, r, bl, b, br in zip(top, top[1:], top[2:], mid, mid[2:],
+                                               bot, bot[1:], bot[2:]):
+            gx = tr - tl + 2*(r - l) + br - bl
+            gy = bl - tl + 2*(b - t) + br - tr
+            # magnitude is never negative, only the upper clip is needed
+            pixels.append(min(round(sqrt(gx*gx+gy*gy)), 255))
+    return { 
         'height': image['height'],
-        'width': image['width'],
-        'pixels': [0]*len(image['pixels'])
+        'width': width,
+        'pixels': pixels
         }
-    kx, ky = [-1, 0, 1, -2, 0, 2, -1, 0, 1], [-1, -2, -1, 0, 0, 0, 1, 2, 1]
-    c1, c2 = make_correlate_filter(kx, 'extend'), make_correlate_filter(ky, 'extend')
-    imx, imy = c1(image), c2(image)
-    for i in range(len(output['pixels'])):
-        output['pixels'][i] = round(math.sqrt(imx['pixels'][i]**2+imy['pixels'][i]**2))
-    return round_and_clip_image(output)
     
 # FILTERS
 
@@ -151,32 +178,41 @@ def make_correlate_filter(kernel, boundary_behavior):
     KERNEL REPRESENTATION: list of floats where each index = a kernel weight
     """
     def correlate(image):
-        result = { 'height': image['height'], 
-                  'width': image['width'], 
-                  'pixels':[0]*len(image['pixels']) }
+        width, height = image['width'], image['height']
         # kernel side length
         deg = int(math.sqrt(len(kernel)))
-        
-        for y in range(image['height']):
-            for x in range(image['width']):
-                matrix = create_matrix(image, deg, x, y, boundary_behavior)
-                # Store weighted pixel value as sum of a list comprehension
-                val = sum(weight*pix for weight, pix in list(zip(kernel, matrix)))
-                set_pixel(result, x, y, val)
-        return result
+        step = deg//2
+        padded = pad_image(image, step, boundary_behavior)
+        if padded is None:
+            return None
+        # offset of each kernel weight from the top-left corner of its window
+        pw = width+2*step
+        taps = [ (kernel[i*deg+j], i*pw+j) for i in range(deg) for j in range(deg) ]
+        pixels, zero = [], [0]*width
+        # rows are independent; accumulate one kernel weight at a time across
+        # the whole row (same summation order as summing each window)
+        for start in range(0, height*pw, pw):
+            row = zero
+            for weight, off in taps:
+                base = start+off
+                row = [ acc + weight*p for acc, p in zip(row, padded[base:base+width]) ]
+            pixels.extend(row)
+        return { 'height': height, 
+                 'width': width, 
+                 'pixels': pixels }
     return correlate
 
 def make_blur_filter(n):
-    kernel = create_box(n)
+    correlate = make_correlate_filter(create_box(n), 'extend')
     def blur(im):
-        correlate = make_correlate_filter(kernel, 'extend')
         res = correlate(im)
         return round_and_clip_image(res)
     return blur
 
 def make_sharpen_filter(n):
+    blur = make_blur_filter(n)
     def sharp(im):
-        blurred, sharpened = make_blur_filter(n)(im), { 
+        blurred, sharpened = blur(im), { 
             'height': im['height'],
             'width': im['width'],
             'pixels': [0]*len(im['pixels'])
@@ -197,17 +233,14 @@ def color_filter_from_greyscale_filter(filt):
     input and produces the filtered color image.
     """
     def color(im):
-        rgb = []
-        for i in range(3):
-            c = { 'height': im['height'],
-               'width': im['width'],
-               'pixels': [ im['pixels'][n][i] for n in range(len(im['pixels'])) ]
-            }
-            filtered = filt(c)
-            rgb.append(filtered['pixels'])
+        # split into one greyscale plane per channel in a single pass
+        planes = [ list(p) for p in zip(*im['pixels']) ] or [[], [], []]
+        rgb = [ filt({ 'height': im['height'],
+                       'width': im['width'],
+                       'pixels': p })['pixels'] for p in planes ]
         res = { 'height': im['height'],
               'width': im['width'],
-              'pixels': [ (r, g, b) for r, g, b in list(zip(rgb[0], rgb[1], rgb[2])) ]
+              'pixels': list(zip(*rgb))
         }
         return res
     return color
@@ -248,16 +281,23 @@ def seam_carving(image, ncols):
     Starting from the given image, use the seam carving technique to remove
     ncols (an integer) columns from the image. Returns a new image.
     """
-    res, n = { 'height': image['height'],
+    res = { 'height': image['height'],
            'width': image['width'],
-           'pixels': image['pixels'].copy() }, 0
-    while n < ncols:
-        grey = greyscale_image_from_color_image(res)
-        energy = compute_energy(grey)
-        cum_energy = cumulative_energy_map(energy)
+           'pixels': image['pixels'].copy() }
+    if ncols <= 0:
+        return res
+    # energy maps are computed in full once, then patched after each removal
+    grey = greyscale_image_from_color_image(res)
+    energy = compute_energy(grey)
+    cum_energy = cumulative_energy_map(energy)
+    for n in range(ncols):
         seam = minimum_energy_seam(cum_energy)
-        res = image_without_seam(res, seam)
-        n += 1
+        # one column per row, top row first
+        cols = [ i % res['width'] for i in reversed(seam) ]
+        res, grey, energy, cum_energy = [ remove_seam_columns(im, cols) for im in
+                                          (res, grey, energy, cum_energy) ]
+        if n < ncols-1:
+            update_energy_maps(grey, energy, cum_energy, cols)
     return res
 
 
@@ -291,31 +331,6 @@ def compute_energy(grey):
     return edges(grey)
 
 
-# Helper function 
-def get_adj_pixels(i, width, energies):
-    """
-    Given an index i and an array of pixel energies, finds pixels top 
-    adjacent to pixel at index i within the array.
-
-    Returns a dict of two lists, one with pixel energies & one with indices.
-    """
-    pixels, indices = [], []
-    # cases for edge of energy array
-    if i % width == 0:
-        pixels.extend([energies[i-width], energies[i-width+1]])
-        indices.extend([(i-width), (i-width+1)])
-    elif (i+1) % width == 0:
-        pixels.extend([energies[i-width-1], energies[i-width]])
-        indices.extend([(i-width-1), (i-width)])
-    else:
-        pixels.extend([energies[i-width-1], energies[i-width], \
-                       energies[i-width+1]])
-        indices.extend([(i-width-1), (i-width), (i-width+1)])
-    return { 'pixels': pixels,
-         'indices': indices
-        }
-
-
 def cumulative_energy_map(energy):
     """
     Given a measure of energy (e.g., the output of the compute_energy
@@ -326,33 +341,110 @@ def cumulative_energy_map(energy):
     the values in the 'pixels' array may not necessarily be in the range [0,
     255].
     """
-    res = { 'height': energy['height'],
-            'width': energy['width'],
-            'pixels': energy['pixels']
+    width, energies = energy['width'], energy['pixels']
+    # first row is unchanged, every later row adds the min of the 3 (or 2 at
+    # the edges) adjacent cumulative energies in the row above it
+    pixels = energies[:width]
+    inf = [float('inf')]
+    for start in range(width, len(energies), width):
+        above = pixels[-width:]
+        pixels.extend([ e + min(l, m, r) for e, l, m, r in
+                        zip(energies[start:start+width], inf+above, above, above[1:]+inf) ])
+    return { 'height': energy['height'],
+             'width': width,
+             'pixels': pixels
             }
-    width, energies = res['width'], res['pixels']
-    # start from row 2, pixel energy at index i + min of adj pixel energies
-    for i in range(width, len(res['pixels'])):
-            res['pixels'][i] = res['pixels'][i] + min(get_adj_pixels(i, width, energies)['pixels'])
-    return res
         
 
+def pixel_energy(grey, x, y):
+    """
+    Given a greyscale image and a pixel location, computes the edges value
+    of that one pixel (Sobel magnitude with 'extend' boundary behavior).
+    """
+    width, height, pixels = grey['width'], grey['height'], grey['pixels']
+    l, r = max(x-1, 0), min(x+1, width-1)
+    top, row, bot = max(y-1, 0)*width, y*width, min(y+1, height-1)*width
+    tl, t, tr = pixels[top+l], pixels[top+x], pixels[top+r]
+    bl, b, br = pixels[bot+l], pixels[bot+x], pixels[bot+r]
+    gx = tr - tl + 2*(pixels[row+r] - pixels[row+l]) + br - bl
+    gy = bl - tl + 2*(b - t) + br - tr
+    return min(round(math.sqrt(gx*gx+gy*gy)), 255)
+
+
+def update_energy_maps(grey, energy, cem, cols):
+    """
+    Given the greyscale image, energy and cumulative energy map of an image
+    that just had a seam removed (each already without the seam's pixels),
+    and the seam's column in each row of the old image (top row first),
+    recomputes only the entries the removal could have changed.
+
+    Energy changes only within a column of the seam in the rows around it;
+    cumulative energy changes there and in a cone that widens by one column
+    per row below. Mutates energy and cem in place.
+    """
+    width, height = grey['width'], grey['height']
+    energies, cum = energy['pixels'], cem['pixels']
+    inf = float('inf')
+    lo = hi = None
+    for y in range(height):
+        near = cols[max(y-1, 0):y+2]
+        # columns whose 3x3 neighborhood lost or shifted a pixel
+        e_lo, e_hi = max(min(near)-1, 0), min(max(near), width-1)
+        for x in range(e_lo, e_hi+1):
+            energies[y*width+x] = pixel_energy(grey, x, y)
+        # cumulative energy: this row's changes plus those spreading from above
+        if lo is None:
+            lo, hi = e_lo, e_hi
+        else:
+            lo, hi = max(min(e_lo, lo-1), 0), min(max(e_hi, hi+1), width-1)
+        row, above = y*width, (y-1)*width
+        for x in range(lo, hi+1):
+            if y == 0:
+                cum[x] = energies[x]
+            else:
+                cum[row+x] = energies[row+x] + min(
+                    cum[above+x-1] if x > 0 else inf,
+                    cum[above+x],
+                    cum[above+x+1] if x < width-1 else inf)
+    
+
 def minimum_energy_seam(cem):
     """
     Given a cumulative energy map, returns a list of the indices into the
     'pixels' list that correspond to pixels contained in the minimum-energy
     seam (computed as described in the lab 2 writeup).
     """
-    seam, rows, start = [], cem['height'], len(cem['pixels'])-cem['width']
-    seam.append(cem['pixels'].index(min(cem['pixels'][start:]), start))
-    for j in range(rows-1):
-        adj = get_adj_pixels(seam[-1], cem['width'], cem['pixels'])
-        low = min(adj['pixels'])
-        seam.append(cem['pixels'].index(low, adj['indices'][0]))
+    width, pixels = cem['width'], cem['pixels']
+    # bottom row: leftmost column with the lowest cumulative energy
+    start = len(pixels)-width
+    bottom = pixels[start:]
+    col = bottom.index(min(bottom))
+    seam = [start+col]
+    # walk upwards, choosing the lowest of the (up to 3) adjacent pixels
+    for row in range(start-width, -1, -width):
+        lo = max(col-1, 0)
+        adj = pixels[row+lo:row+min(col+2, width)]
+        col = lo + adj.index(min(adj))
+        seam.append(row+col)
     return seam
     
 
 
+def remove_seam_columns(image, cols):
+    """
+    Given an image and the column of the pixel to remove from each row (top
+    row first), returns a new image, one column narrower, without them.
+    """
+    width, pixels, res = image['width'], image['pixels'], []
+    for start, col in zip(range(0, len(pixels), width), cols):
+        res.extend(pixels[start:start+col])
+        res.extend(pixels[start+col+1:start+width])
+    return { 'height': image['height'],
+             'width': width-1,
+             'pixels': res
+            }
+
+
 def image_without_seam(image, seam):
     """
     Given a (color) image and a list of indices to be removed from the image,
@@ -361,13 +453,16 @@ def image_without_seam(image, seam):
     in the given list.
     """
     # new width = (original width - 1), path/column removal
+    # copy the runs of pixels between consecutive seam indices
+    pixels, kept, prev = image['pixels'], [], 0
+    for i in sorted(seam):
+        kept.extend(pixels[prev:i])
+        prev = i+1
+    kept.extend(pixels[prev:])
     res = { 'height': image['height'],
            'width': image['width']-1,
-           'pixels': image['pixels']
+           'pixels': kept
         }
-    # seam = list of large -> small indices, can use .pop()
-    for i in seam:
-        res['pixels'].pop(i)
     return res
 
 
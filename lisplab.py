@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 
+import re
 import sys
+import math
 import doctest
 
 sys.setrecursionlimit(10_000)
@@ -75,10 +77,13 @@ def number_or_symbol(x):
         try:
             return float(x)
         except ValueError:
-            return x
+            # symbols are interned so repeated names share one string
+            return sys.intern(x)
 
-def get_chars(string):
-    yield from string
+# comments run from a semicolon to the end of the line; tokens are single
+# parentheses or runs of anything other than whitespace and parentheses
+comment_pattern = re.compile(r';[^\n\r]*')
+token_pattern = re.compile(r'[()]|[^\s()]+')
 
 
 def tokenize(source):
@@ -93,35 +98,7 @@ def tokenize(source):
     ['(', 'cat', '(', 'dog', '(', 'tomato', ')', ')', ')']
     
     """
-    out, onlychars, lines = [], [], source.splitlines()
-    # omit comments prefixed w/ semicolon by line
-    for line in lines:
-        colon = line.find(';')
-        if colon != -1:
-            # include subset of line up to semicolon
-            substr = line[:colon]
-            onlychars.extend(substr.split())
-        # no comment found, split line by whitespace
-        else:
-            onlychars.extend(line.split())
-            
-    for elem in onlychars:
-        token = ''
-        for char in get_chars(elem):
-            # append single parentheses as individual tokens
-            if char in '()':
-                # if ( or ) encountered while building a token, append + reset token
-                if token:
-                    out.append(token)
-                    token = ''
-                out.append(char)
-            # anything else, extend token with char
-            else:
-                token += char
-        # reach end of elem and token not empty str, append token
-        if token:
-            out.append(token)
-    return out
+    return token_pattern.findall(comment_pattern.sub('', source))
 
 
 def parse(tokens):
@@ -147,37 +124,26 @@ def parse(tokens):
     >>> parse(['(', 'define', 'circle-area', '(', 'lambda', '(', 'r', ')', '(', '*', '3.14', '(', '*', 'r', 'r', ')', ')', ')', ')'])
     ['define', 'circle-area', ['lambda', ['r'], ['*', 3.14, ['*', 'r', 'r']]]]
     """
-    def parse_expression(index):
-        token = number_or_symbol(tokens[index])
-        # base: token is a num, variable, or symbol
-        if not token == '(':
-            return token, index+1
-        # bad token
-        elif ' ' in token or '\n' in token or ';' in token:
-            raise SchemeSyntaxError
+    # stack of S-expressions still open, bottom holds the top-level result
+    stack = [[]]
+    for token in tokens:
+        if token == '(':
+            stack.append([])
+        elif token == ')':
+            # closing parenthesis with nothing open
+            if len(stack) == 1:
+                raise SchemeSyntaxError
+            subexpression = stack.pop()
+            stack[-1].append(subexpression)
         else:
-            subexpression = []
-            # check next token for closing parentheses
-            while tokens[index+1] != ')':
-                token, index = parse_expression(index+1)
-                subexpression.append(token)
-                # decrement index to avoid skipping potential )
-                index -= 1
-            # increment index by 2 for position of 1 beyond matching )
-            return subexpression, index+2
-    
-    # check for incorrect expressions before parsing
-    if '(' and ')' in tokens:
-        if tokens.count('(') != tokens.count(')') or tokens.index(')') < tokens.index('('):
-            raise SchemeSyntaxError
-    if ('(' in tokens and ')' not in tokens) or (')' in tokens and '(' not in tokens):
+            stack[-1].append(number_or_symbol(token))
+    # unclosed parentheses, or not exactly one expression
+    if len(stack) != 1 or len(stack[0]) != 1:
         raise SchemeSyntaxError
     # REVISE: keywords in expression that are not enclosed by parentheses
-    if ('(' not in tokens) and ('define' in tokens or 'lambda' in tokens):
+    if not isinstance(stack[0][0], list) and stack[0][0] in ('define', 'lambda'):
         raise SchemeSyntaxError
-        
-    parsed, next_index = parse_expression(0)
-    return parsed
+    return stack[0][0]
         
         
 
@@ -189,58 +155,84 @@ def parse(tokens):
 booleans = ['#t', '#f']
 
 def is_list(obj):
-    # check for empty list or cons cell
-    if obj[0] == []:
-        return booleans[0]
-    elif not isinstance(obj[0], Pair):
-        return booleans[1]
-    else:
-        cdr = scheme_builtins['cdr'](obj)
-        return is_list([cdr])
+    if len(obj) != 1:
+        raise SchemeEvaluationError
+    # walk cdrs to the end of the chain, proper lists end in nil
+    dalist = obj[0]
+    while isinstance(dalist, Pair):
+        # contiguous tails are always proper lists
+        if isinstance(dalist, VecList):
+            return booleans[0]
+        dalist = dalist.cdr
+    return booleans[0] if dalist == [] else booleans[1]
 
 def length(dalist):
-    if dalist[0] == []:
-        return 0
-    elif not isinstance(dalist[0], Pair):
-        raise SchemeEvaluationError 
-    else:
-        cdr = scheme_builtins['cdr'](dalist)
-        return 1 + length([cdr])
+    if len(dalist) != 1:
+        raise SchemeEvaluationError
+    n, cell = 0, dalist[0]
+    while isinstance(cell, Pair):
+        if isinstance(cell, VecList):
+            return n + len(cell)
+        n += 1
+        cell = cell.cdr
+    # improper list or not a list at all
+    if cell != []:
+        raise SchemeEvaluationError
+    return n
 
 def list_ref(arg):
-    if not arg or len(arg) > 2:
+    if len(arg) != 2:
         raise SchemeEvaluationError
     dalist, ind = arg[0], arg[1]
     # not a cons cell OR empty list, cannot index
-    if not isinstance(dalist, Pair) or dalist == []:
+    if not isinstance(dalist, Pair):
+        raise SchemeEvaluationError
+    # index must be a whole, nonnegative number (1.0 indexes like 1)
+    if not isinstance(ind, (int, float)) or ind < 0 or ind % 1:
         raise SchemeEvaluationError
-    if ind == 0:
-        return scheme_builtins['car']([dalist])
-    # recurse on cdr, decrement index
-    return list_ref([scheme_builtins['cdr']([dalist]), ind-1])
+    ind = int(ind)
+    # step ind cells down the chain, jumping straight to contiguous items
+    while ind > 0:
+        if isinstance(dalist, VecList):
+            if ind >= len(dalist):
+                raise SchemeEvaluationError
+            return dalist.items[dalist.start+ind]
+        dalist = dalist.cdr
+        if not isinstance(dalist, Pair):
+            raise SchemeEvaluationError
+        ind -= 1
+    return dalist.car
         
 def append(lists):
-    concat = ['list']
-    if not lists:
-        pass
-    elif not all(is_list([dalist]) == booleans[0] for dalist in lists):
+    if not all(is_list([dalist]) == booleans[0] for dalist in lists):
         raise SchemeEvaluationError
-    else:
-        for dalist in lists:
-            stop = length([dalist])
-            for i in range(stop):
-                val = list_ref([dalist, i])
-                if isinstance(val, Pair):
-                    val = val.astokens()
-                concat += [val]
-    return evaluate(concat)
+    # copy every element into one contiguous list
+    items = []
+    for dalist in lists:
+        while isinstance(dalist, Pair):
+            if isinstance(dalist, VecList):
+                items.extend(dalist.items[dalist.start:])
+                break
+            items.append(dalist.car)
+            dalist = dalist.cdr
+    return VecList(items) if items else []
+
+def divide(args):
+    if not args:
+        raise SchemeEvaluationError
+    if len(args) == 1:
+        return 1/args[0]
+    # divide first argument by each of the rest in turn
+    quotient = args[0]
+    for arg in args[1:]:
+        quotient /= arg
+    return quotient
             
 scheme_builtins = {
     "+": sum,
     "-": lambda args: -args[0] if len(args) == 1 else (args[0] - sum(args[1:])),
-    '*': lambda args: 1 if not args else args[0]*scheme_builtins['*'](args[1:]),
-    '/': lambda args: (i for i in args).throw(SchemeEvaluationError) if not args else \
-        (1/args[0] if len(args) == 1 else args[0]*scheme_builtins['*']([scheme_builtins['/']([arg]) for arg in args[1:]])),
+    '*': math.prod,
+    '/': divide,
     'equal?': lambda args: booleans[0] if all(args[i] == args[i+1] for i in range(len(args)-1)) else booleans[1],
     '>': lambda args: booleans[0] if all(args[i] > args[i+1] for i in range(len(args)-1)) else booleans[1],
     '>=': lambda args: booleans[0] if all(args[i] >= args[i+1] for i in range(len(args)-1)) else booleans[1],
@@ -268,6 +260,8 @@ scheme_builtins = {
 ##############
 
 class Pair:
+    __slots__ = ('car', 'cdr')
+
     def __init__(self, car, cdr):
         self.car = car
         self.cdr = cdr
@@ -275,24 +269,56 @@ class Pair:
     def __repr__(self):
         return f'(cons {self.car}, {self.cdr})'
     
-    def astokens(self):
-        car, cdr = self.car, self.cdr
-        if isinstance(self.car, Pair):
-            car = self.car.astokens()
-        if isinstance(self.cdr, Pair):
-            cdr = self.cdr.astokens()
-        if cdr == []:
-            cdr = 'nil'
-        return ['cons', car, cdr]
+class VecList(Pair):
+    """
+    A proper Scheme list stored contiguously: the cons cells from index
+    start onwards of a shared Python list. car, cdr, length and list-ref are
+    all O(1); cdr returns a view sharing the same backing list (or nil once
+    the end is reached). Behaves as a Pair everywhere else. The car and cdr
+    slots inherited from Pair are shadowed by properties and left unused.
+    """
+    __slots__ = ('items', 'start')
+
+    def __init__(self, items, start=0):
+        self.items = items
+        self.start = start
+
+    @property
+    def car(self):
+        return self.items[self.start]
+
+    @property
+    def cdr(self):
+        if self.start+1 == len(self.items):
+            return []
+        return VecList(self.items, self.start+1)
+
+    def __len__(self):
+        return len(self.items) - self.start
+
+    def __eq__(self, other):
+        # cdr creates a new view each time, so compare views by position
+        return isinstance(other, VecList) and self.items is other.items \
+            and self.start == other.start
+
+    def __hash__(self):
+        # equal views hash alike, like Pair's identity hash otherwise
+        return hash((id(self.items), self.start))
 
 class Function:
-    def __init__(self, params, body, enc_frame):
+    __slots__ = ('params', 'body', 'enc_frame', 'code')
+
+    def __init__(self, params, body, enc_frame, code=None):
         self.params = params
         self.body = body
         self.enc_frame = enc_frame
+        # body compiled once, run on every call (compiled lambdas pass theirs in)
+        self.code = compile_expression(body) if code is None else code
     
 
 class Frame:
+    __slots__ = ('variables', 'parent_frame')
+
     def __init__(self, parent_frame=None):
         self.variables = {}
         self.parent_frame = parent_frame
@@ -302,19 +328,21 @@ class Frame:
         return exp
 
     def search_frames(self, var_name):
-        if var_name in self.variables:
-            return self.variables[var_name]
-        while self.parent_frame is not None:
-            self = self.parent_frame
-            return self.search_frames(var_name)
+        # walk up the parent chain, returning the closest binding
+        frame = self
+        while frame is not None:
+            if var_name in frame.variables:
+                return frame.variables[var_name]
+            frame = frame.parent_frame
         raise SchemeNameError 
         
     def find_nearest(self, var_name):
-        if var_name in self.variables:
-            return self
-        while self.parent_frame is not None:
-            self = self.parent_frame
-            return self.find_nearest(var_name)
+        # walk up the parent chain to the closest frame defining var_name
+        frame = self
+        while frame is not None:
+            if var_name in frame.variables:
+                return frame
+            frame = frame.parent_frame
         raise SchemeNameError 
         
     def delete(self, var_name):
@@ -332,6 +360,82 @@ def valid_name(name):
     return name.isascii() and '(' not in name and ')' not in name and ' ' not in name
 
 
+# Special forms: each takes the full expression and the frame to evaluate
+# it in, and raises SchemeEvaluationError if the expression is malformed
+
+def evaluate_set(tree, eval_frame):
+    var, expr = tree[1], evaluate(tree[2], eval_frame)
+    nearest_frame = eval_frame.find_nearest(var)
+    return nearest_frame.define_var(var, expr)
+
+def evaluate_let(tree, eval_frame):
+    names = [value[0] for value in tree[1]]
+    variables = [evaluate(value[1], eval_frame) for value in tree[1]]
+    lilframe = Frame(eval_frame)
+    for name, variable in zip(names, variables):
+        lilframe.define_var(name, variable)
+    return evaluate(tree[2], lilframe)
+
+def evaluate_del(tree, eval_frame):
+    return eval_frame.delete(tree[1])
+
+def evaluate_list(tree, eval_frame):
+    values = [evaluate(elem, eval_frame) for elem in tree[1:]]
+    if not values:
+        return evaluate('nil', eval_frame)
+    return VecList(values)
+
+def evaluate_cons(tree, eval_frame):
+    if len(tree[1:]) != 2:
+        raise SchemeEvaluationError
+    return Pair(evaluate(tree[1], eval_frame), evaluate(tree[2], eval_frame))
+
+# conditionals: booleans evaluate to themselves, so every argument is
+# simply evaluated and compared against #t / #f
+def evaluate_if(tree, eval_frame):
+    if evaluate(tree[1], eval_frame) == booleans[0]:
+        return evaluate(tree[2], eval_frame)
+    return evaluate(tree[3], eval_frame)
+
+# boolean combinators, short-circuiting on the first deciding argument
+def evaluate_and(tree, eval_frame):
+    for arg in tree[1:]:
+        if evaluate(arg, eval_frame) == booleans[1]:
+            return booleans[1]
+    return booleans[0]
+
+def evaluate_or(tree, eval_frame):
+    for arg in tree[1:]:
+        if evaluate(arg, eval_frame) == booleans[0]:
+            return booleans[0]
+    return booleans[1]
+
+# define/lambda statements
+def evaluate_define(tree, eval_frame):
+    # short syntax define
+    if isinstance(tree[1], list):
+        return eval_frame.define_var(tree[1][0], evaluate(['lambda', tree[1][1:], tree[2]], eval_frame))
+    elif valid_name(tree[1]):
+        return eval_frame.define_var(tree[1], evaluate(tree[2], eval_frame))
+    raise SchemeEvaluationError
+
+def evaluate_lambda(tree, eval_frame):
+    return Function(tree[1], tree[2], eval_frame)
+
+special_forms = {
+    'set!': evaluate_set,
+    'let': evaluate_let,
+    'del': evaluate_del,
+    'list': evaluate_list,
+    'cons': evaluate_cons,
+    'if': evaluate_if,
+    'and': evaluate_and,
+    'or': evaluate_or,
+    'define': evaluate_define,
+    'lambda': evaluate_lambda
+}
+
+
 def evaluate(tree, eval_frame=None):
     """
     Evaluate the given syntax tree according to the rules of the Scheme
@@ -344,67 +448,21 @@ def evaluate(tree, eval_frame=None):
     if not eval_frame:
         eval_frame = Frame(builtins)
     
+    # exact type checks: parsed trees only ever hold str, int, float, list
+    tree_type = type(tree)
     # base: expression is a str representing a variable name or function symbol
-    if isinstance(tree, str):
+    if tree_type is str:
         return eval_frame.search_frames(tree)
     # base: expression is a number
-    elif isinstance(tree, (float, int)):
+    elif tree_type is int or tree_type is float:
         return tree
     # recursive: expression is a list (function OR special form)
-    elif isinstance(tree, list):
+    elif tree_type is list:
         if not tree:
             pass
-        # variable manipulation
-        elif tree[0] == 'set!':
-            var, expr = tree[1], evaluate(tree[2], eval_frame)
-            nearest_frame = eval_frame.find_nearest(var)
-            return nearest_frame.define_var(var, expr)
-        elif tree[0] == 'let':
-                names = [value[0] for value in tree[1]]
-                variables = [evaluate(value[1], eval_frame) for value in tree[1]]
-                lilframe = Frame(eval_frame)
-                for name, variable in zip(names, variables):
-                    lilframe.define_var(name, variable)
-                return evaluate(tree[2], lilframe)
-        elif tree[0] == 'del':
-            return eval_frame.delete(tree[1])
-        # lists
-        elif tree[0] == 'list':
-            if not tree[1:]:
-                return evaluate('nil', eval_frame)
-            rest = [elem for elem in tree[2:]]
-            return evaluate(['cons', tree[1], ['list']+rest], eval_frame)
-        elif tree[0] == 'cons':
-            if len(tree[1:]) == 2:
-                return Pair(evaluate(tree[1], eval_frame), evaluate(tree[2], eval_frame))
-        # conditionals: COND, T_EXP, F_EXP may be boolean OR evaluable
-        elif tree[0] == 'if':
-            if (tree[1] not in booleans and evaluate(tree[1], eval_frame) == booleans[0]) \
-                or tree[1] == booleans[0]:
-                return tree[2] if tree[2] in booleans else evaluate(tree[2], eval_frame)
-            return tree[3] if tree[3] in booleans else evaluate(tree[3], eval_frame)
-        # boolean combinators
-        elif tree[0] == 'and':
-            for arg in tree[1:]:
-                if (arg not in booleans and evaluate(arg, eval_frame) == booleans[1]) \
-                    or arg == booleans[1]:
-                    return booleans[1]
-            return booleans[0]
-        elif tree[0] == 'or':
-            for arg in tree[1:]:
-                if (arg not in booleans and evaluate(arg, eval_frame) == booleans[0]) \
-                    or arg == booleans[0]:
-                    return booleans[0]
-            return booleans[1]
-        # define/lambda statements
-        elif tree[0] == 'define':
-            # short syntax define
-            if isinstance(tree[1], list):
-                return eval_frame.define_var(tree[1][0], evaluate(['lambda', tree[1][1:], tree[2]], eval_frame))
-            elif valid_name(tree[1]):
-                return eval_frame.define_var(tree[1], evaluate(tree[2], eval_frame))
-        elif tree[0] == 'lambda':
-            return Function(tree[1], tree[2], eval_frame)
+        # special forms are looked up by keyword
+        elif isinstance(tree[0], str) and tree[0] in special_forms:
+            return special_forms[tree[0]](tree, eval_frame)
         # function operations
         else:
             # get built-in/custom function, apply to rest of expr
@@ -416,15 +474,122 @@ def evaluate(tree, eval_frame=None):
                     lil_frame = Frame(func.enc_frame)
                     for inp, par in zip(inputs, params):
                         lil_frame.define_var(par, inp)
-                    return evaluate(func.body, lil_frame)
+                    return func.code(lil_frame)
             # list expr w/ nonfunction 1st element
             elif not callable(func):
                 pass
             else:
                 return func([evaluate(elem, eval_frame) for elem in tree[1:]])
-        print(f'{tree=}')
         raise SchemeEvaluationError
 
+###############
+# Compilation #
+###############
+
+# Function bodies are turned into nested Python closures taking the frame to
+# run in, so calling a function does not re-dispatch on the syntax tree. Each
+# closure behaves exactly like evaluate on the same tree; anything without a
+# specialized closure just calls evaluate (or its special form) directly.
+
+def compile_expression(tree):
+    tree_type = type(tree)
+    if tree_type is str:
+        return lambda frame: frame.search_frames(tree)
+    elif tree_type is int or tree_type is float:
+        return lambda frame: tree
+    elif tree_type is not list or not tree:
+        return lambda frame: evaluate(tree, frame)
+    elif isinstance(tree[0], str) and tree[0] in special_forms:
+        compiler = special_compilers.get(tree[0])
+        if compiler is not None:
+            code = compiler(tree)
+            if code is not None:
+                return code
+        special = special_forms[tree[0]]
+        return lambda frame: special(tree, frame)
+    return compile_call(tree)
+
+def compile_call(tree):
+    func_code = compile_expression(tree[0])
+    arg_codes = [compile_expression(arg) for arg in tree[1:]]
+    def call(frame):
+        func = func_code(frame)
+        if isinstance(func, Function):
+            if len(arg_codes) == len(func.params):
+                inputs = [arg(frame) for arg in arg_codes]
+                lil_frame = Frame(func.enc_frame)
+                for inp, par in zip(inputs, func.params):
+                    lil_frame.define_var(par, inp)
+                return func.code(lil_frame)
+        elif callable(func):
+            return func([arg(frame) for arg in arg_codes])
+        raise SchemeEvaluationError
+    return call
+
+def compile_if(tree):
+    if len(tree) < 4:
+        return None
+    cond, true_exp, false_exp = [compile_expression(exp) for exp in tree[1:4]]
+    true = booleans[0]
+    return lambda frame: true_exp(frame) if cond(frame) == true else false_exp(frame)
+
+def compile_and(tree):
+    arg_codes, false = [compile_expression(arg) for arg in tree[1:]], booleans[1]
+    def and_(frame):
+        for arg in arg_codes:
+            if arg(frame) == false:
+                return false
+        return booleans[0]
+    return and_
+
+def compile_or(tree):
+    arg_codes, true = [compile_expression(arg) for arg in tree[1:]], booleans[0]
+    def or_(frame):
+        for arg in arg_codes:
+            if arg(frame) == true:
+                return true
+        return booleans[1]
+    return or_
+
+def compile_let(tree):
+    if len(tree) < 3 or not isinstance(tree[1], list) or \
+        not all(isinstance(value, list) and len(value) >= 2 for value in tree[1]):
+        return None
+    names = [value[0] for value in tree[1]]
+    value_codes = [compile_expression(value[1]) for value in tree[1]]
+    body = compile_expression(tree[2])
+    def let(frame):
+        variables = [value(frame) for value in value_codes]
+        lilframe = Frame(frame)
+        for name, variable in zip(names, variables):
+            lilframe.define_var(name, variable)
+        return body(lilframe)
+    return let
+
+def compile_lambda(tree):
+    if len(tree) < 3:
+        return None
+    # lambdas re-created at runtime share the body compiled here
+    params, body = tree[1], tree[2]
+    code = compile_expression(body)
+    return lambda frame: Function(params, body, frame, code)
+
+def compile_define(tree):
+    # short syntax define, its lambda compiled once
+    if len(tree) < 3 or not isinstance(tree[1], list) or not tree[1]:
+        return None
+    name, make = tree[1][0], compile_lambda(['lambda', tree[1][1:], tree[2]])
+    return lambda frame: frame.define_var(name, make(frame))
+
+special_compilers = {
+    'if': compile_if,
+    'and': compile_and,
+    'or': compile_or,
+    'let': compile_let,
+    'lambda': compile_lambda,
+    'define': compile_define
+}
+
 def result_and_frame(tree, eval_frame=None):
     if not eval_frame:
         eval_frame = Frame(builtins)
@@ -19,8 +19,24 @@ def dump(game):
             print(f"{key}:", val)
 
 
+def all_safe_revealed(board, hidden):
+    """
+    Returns True if no safe square of a (nested list) board is still hidden,
+    stopping at the first hidden safe square found
+
+    """
+    if board and type(board[0]) == list:
+        return all(all_safe_revealed(b, h) for b, h in zip(board, hidden))
+    if True not in hidden:
+        # fully revealed row, checked by list's own scan
+        return True
+    return all(not h or v == '.' for v, h in zip(board, hidden))
+
+
 # 2-D IMPLEMENTATION
-steps = [(-1, 1), (0, 1), (1, 1), (-1, 0), (1, 0), (-1, -1), (0, -1), (1, -1)]
+# display string for every value a 2-D board square can hold
+cell_text = {'.': '.', 0: ' ', 1: '1', 2: '2', 3: '3', 4: '4', 5: '5', 6: '6',
+             7: '7', 8: '8'}
 
 def new_game_2d(num_rows, num_cols, bombs):
     """
@@ -48,18 +64,18 @@ def new_game_2d(num_rows, num_cols, bombs):
         [True, True, True, True]
     state: ongoing
     """
-    board = [[0 for c in range(num_cols)] for r in range(num_rows)]
-    for b in bombs:
-        board[b[0]][b[1]] = '.'
-    hidden = [[True for c in range(num_cols)] for r in range(num_rows)]
-    
-    def get_neighbors(r, c):
-        return [(r+i, c+j) for i, j in steps if 0 <= r+i < num_rows and \
-                    0 <= c+j < num_cols and (r+i, c+j) not in bombs]
-    for b in bombs:
-        neighbors = get_neighbors(*b)
-        for n in neighbors:
-            board[n[0]][n[1]] += 1
+    hidden = [[True] * num_cols for r in range(num_rows)]
+    # bomb mask padded with a ring of zeros so every cell has 8 neighbors
+    mask = [[0] * (num_cols + 2) for r in range(num_rows + 2)]
+    for r, c in bombs:
+        mask[r+1][c+1] = 1
+    # 3-wide horizontal sums, then add 3 of those vertically for 3x3 counts
+    # (a safe cell's own mask entry is 0, so the box sum is its neighbors)
+    across = [[a + b + c for a, b, c in zip(row, row[1:], row[2:])] for row in mask]
+    board = [['.' if bomb else a + b + c for a, b, c, bomb in
+              zip(above, middle, below, row[1:])]
+             for above, middle, below, row in
+             zip(across, across[1:], across[2:], mask[1:])]
             
     return {
         "dimensions": (num_rows, num_cols),
@@ -129,40 +145,60 @@ def dig_2d(game, row, col):
         [True, True, True, True]
     state: defeat
     """
-    rows, cols = game['dimensions'][0], game['dimensions'][1]
-    def get_neighbors(r, c):
-        return [(r+i, c+j) for i, j in steps if 0 <= r+i < rows and \
-                    0 <= c+j < cols and game['board'][r+i][c+j] != '.' ]
-            
-    def check_victory(game):
-        hidden = [(r, c) for r in range(rows) for c in range(cols) \
-                  if game['hidden'][r][c]]
-        for tile in hidden:
-            if game['board'][tile[0]][tile[1]] != '.':
-                return False
-        return True
-                
-    def dig_recursive(row, col):
+    (rows, cols), board, hidden = game['dimensions'], game['board'], game['hidden']
+
+    def dig_iterative(row, col):
         if game["state"] == "defeat" or game["state"] == "victory" or \
-            game['hidden'][row][col] == False:
-            return 0 
-        game['hidden'][row][col] = False
-        if game['board'][row][col] == 0:
-            neighbors = get_neighbors(row, col)
-            return 1 + sum([dig_recursive(n[0], n[1]) for n in neighbors])
-        else:
-            if game['board'][row][col] == '.':
+            not hidden[row][col]:
+            return 0
+        if board[row][col] != 0:
+            hidden[row][col] = False
+            if board[row][col] == '.':
                 game['state'] = 'defeat'
             return 1
+        # scanline fill: each seed is a hidden zero, grown into a whole run
+        revealed, seeds = 0, [(row, col)]
+        while seeds:
+            r, c = seeds.pop()
+            if not hidden[r][c]:
+                continue
+            hrow, brow = hidden[r], board[r]
+            lo = hi = c
+            while lo > 0 and hrow[lo-1] and brow[lo-1] == 0:
+                lo -= 1
+            while hi < cols-1 and hrow[hi+1] and brow[hi+1] == 0:
+                hi += 1
+            left, right = max(lo-1, 0), min(hi+2, cols)
+            # the run and its two ends are all revealed
+            for nc in range(left, right):
+                if hrow[nc]:
+                    hrow[nc] = False
+                    revealed += 1
+            # rows above and below: reveal numbers, seed each run of zeros
+            for nr in (r-1, r+1):
+                if 0 <= nr < rows:
+                    hrow, brow = hidden[nr], board[nr]
+                    in_run = False
+                    for nc in range(left, right):
+                        if hrow[nc] and brow[nc] == 0:
+                            if not in_run:
+                                seeds.append((nr, nc))
+                            in_run = True
+                            continue
+                        if hrow[nc]:
+                            hrow[nc] = False
+                            revealed += 1
+                        in_run = False
+        return revealed
             
-    revealed = dig_recursive(row, col)
-    if check_victory(game):
+    revealed = dig_iterative(row, col)
+    if game['state'] != 'defeat' and all_safe_revealed(board, hidden):
         game['state'] = 'victory'
     return revealed
     
 
 
-def render_2d_locations(game, xray=False):
+def render_2d_locations(game, xray=False, flat=False):
     """
     Prepare a game for display.
 
@@ -176,9 +212,11 @@ def render_2d_locations(game, xray=False):
        game (dict): Game state
        xray (bool): Whether to reveal all tiles or just the that are not
                     game['hidden']
+       flat (bool): Whether to return one flat, row-major list of strings
+                    instead of a list of rows
 
     Returns:
-       A 2D array (list of lists)
+       A 2D array (list of lists), or a flat list if flat is True
 
     >>> render_2d_locations({'dimensions': (2, 4),
     ...         'state': 'ongoing',
@@ -196,15 +234,17 @@ def render_2d_locations(game, xray=False):
     ...                   [True, True, True, False]]}, True)
     [['.', '3', '1', ' '], ['.', '.', '1', ' ']]
     """
-    rows, cols = game['dimensions'][0], game['dimensions'][1]
-    array = [[str(game['board'][r][c]) for c in range(cols)] for r in range(rows)]
-    for r in range(rows):
-        for c in range(cols):
-            if game['board'][r][c] == 0:
-                array[r][c] = ' '
-            if not xray and game['hidden'][r][c]:
-                array[r][c] = '_'
-    return array
+    board = game['board']
+    if flat:
+        if xray:
+            return [cell_text[v] for row in board for v in row]
+        return ['_' if h else cell_text[v]
+                for row, hidden_row in zip(board, game['hidden'])
+                for v, h in zip(row, hidden_row)]
+    if xray:
+        return [[cell_text[v] for v in row] for row in board]
+    return [['_' if h else cell_text[v] for v, h in zip(row, hidden_row)]
+            for row, hidden_row in zip(board, game['hidden'])]
         
 
 
@@ -232,9 +272,7 @@ def render_2d_board(game, xray=False):
     ...                            [True, True, False, True]]})
     '.31_\\n__1_'
     """
-    array = render_2d_locations(game, xray)
-    board = '\n'.join([''.join(row) for row in array])
-    return board
+    return '\n'.join(map(''.join, render_2d_locations(game, xray)))
         
 
 
@@ -246,24 +284,47 @@ def init_nested(dimen, val):
     Initiates a nested list of the given dimensions with each value = val
 
     """
-    dimen = list(dimen)
-    if len(dimen) == 1:
-        return [val for i in range(dimen[0])]
-    else:
-        d = dimen.pop(0)
-        return [init_nested(dimen, val) for i in range(d)]
+    size = 1
+    for d in dimen:
+        size *= d
+    return nest([val] * size, dimen)
         
              
 
+def nest(flat, dimen):
+    """
+    Groups a flat list, in row-major order, into nested lists of the given
+    dimensions
+
+    """
+    # number of lists at each depth, so zero-length dimensions still nest
+    counts = [1]
+    for d in dimen[:-1]:
+        counts.append(counts[-1] * d)
+    for k in range(len(dimen)-1, 0, -1):
+        d = dimen[k]
+        flat = [flat[i*d:(i+1)*d] for i in range(counts[k])]
+    return flat
+
+
+def flatten(nested):
+    """
+    Returns the values of a nested list as one flat list, in row-major order
+
+    """
+    while nested and type(nested[0]) == list:
+        nested = [val for sub in nested for val in sub]
+    return nested
+
+
 def get_coord(lst, coord):
     """
     Returns value at a given coordinate within a nested list 
 
     """
-    if type(lst[0]) != list:
-        return lst[coord[0]]
-    else:
-        return get_coord(lst[coord[0]], coord[1:])
+    for i in coord[:-1]:
+        lst = lst[i]
+    return lst[coord[-1]]
 
 
 def set_coord(lst, coord, val):
@@ -271,53 +332,55 @@ def set_coord(lst, coord, val):
     Sets value at given coordinate within a nested list to val 
 
     """
-    if type(lst[0]) != list:
-        lst[coord[0]] = val
-    else:
-        set_coord(lst[coord[0]], coord[1:], val)
+    for i in coord[:-1]:
+        lst = lst[i]
+    lst[coord[-1]] = val
             
-def increment_coord(lst, coord):
+nd_steps = [-1, 0, 1]
+nd_comrades = {}
+def comrades_function(ndim):
     """
-    Increments value at given coordinate within a nested list by 1 
+    Returns a neighbor-listing function specialized to ndim dimensions: its
+    source is generated with one range per axis unrolled, then compiled once
+    per number of dimensions
 
     """
-    if type(lst[0]) != list:
-        lst[coord[0]] += 1
-    else:
-        increment_coord(lst[coord[0]], coord[1:])
-    
+    if ndim not in nd_comrades:
+        axes = range(ndim)
+        coords = ''.join(f'c{k}, ' for k in axes)
+        lines = [f'def comrades(coord, dimen):',
+                 f'    ({coords}) = coord',
+                 f'    ({coords.replace("c", "d")}) = dimen']
+        lines.extend(f'    r{k} = range(c{k}-1 if c{k} else 0, '
+                     f'c{k}+2 if c{k}+2 < d{k} else d{k})' for k in axes)
+        loops = ' '.join(f'for i{k} in r{k}' for k in axes)
+        lines.append(f'    return [({coords.replace("c", "i")}) {loops}]')
+        namespace = {}
+        exec('\n'.join(lines), namespace)
+        nd_comrades[ndim] = namespace['comrades']
+    return nd_comrades[ndim]
 
-def valid_coords(dimen):
-    """
-    Returns all valid coordinates in a board of the given dimensions
-    
-    """
-    
-    if len(dimen) == 1:
-        for i in range(dimen[0]):
-            yield (i,)
-    else:
-        for n in valid_coords(dimen[1:]):
-            for i in range(dimen[0]):
-                yield (i,)+n
-        
 
-nd_steps = [-1, 0, 1]
 def get_comrades(coord, dimen):
     """
     Returns all valid neighboring coordinates of a given coord in an array of
     given dimensions
 
     """
-    if len(coord) == 1:
-        for s in nd_steps:
-            if 0 <= coord[0]+s < dimen[0]:
-                yield (coord[0]+s,)
-    else:
-        for c in get_comrades(coord[1:], dimen[1:]):
-            for s in nd_steps:
-                if 0 <= coord[0]+s < dimen[0]:
-                    yield (coord[0]+s,)+c
+    return comrades_function(len(coord))(coord, dimen)
+
+
+def render_nested(board, hidden, xray):
+    """
+    Renders matching nested lists of board values and hidden flags into
+    nested lists of display strings, one innermost list at a time
+
+    """
+    if board and type(board[0]) == list:
+        return [render_nested(b, h, xray) for b, h in zip(board, hidden)]
+    if xray:
+        return [' ' if v == 0 else str(v) for v in board]
+    return ['_' if h else ' ' if v == 0 else str(v) for v, h in zip(board, hidden)]
 
                 
 def new_game_nd(dimensions, bombs):
@@ -347,15 +410,24 @@ def new_game_nd(dimensions, bombs):
         [[True, True], [True, True], [True, True], [True, True]]
     state: ongoing
     """
-    board, hidden = init_nested(dimensions, 0), init_nested(dimensions, True)
-    bombs = set(bombs)
-    
-    for b in bombs:
-        set_coord(board, b, '.')
-        neighbors = get_comrades(b, dimensions)
-        for n in neighbors:
-            if n not in bombs:
-                increment_coord(board, n)
+    hidden = init_nested(dimensions, True)
+    # count into a flat row-major buffer, indexing cells by linear offset
+    strides, size = [], 1
+    for d in reversed(dimensions):
+        strides.insert(0, size)
+        size *= d
+    counts, is_bomb = [0] * size, [False] * size
+    for b in set(bombs):
+        # linear indices of b and all its in-bounds neighbors
+        cells = [0]
+        for c, d, stride in zip(b, dimensions, strides):
+            cells = [i + (c+s)*stride for i in cells for s in nd_steps
+                     if 0 <= c+s < d]
+        for i in cells:
+            counts[i] += 1
+        is_bomb[sum(c*stride for c, stride in zip(b, strides))] = True
+    board = nest(['.' if bomb else n for n, bomb in zip(counts, is_bomb)],
+                 dimensions)
 
     return {'dimensions': dimensions, 
             'board': board, 
@@ -422,41 +494,41 @@ def dig_nd(game, coordinates):
         [[True, True], [True, True], [True, True], [True, True]]
     state: defeat
     """
-    all_coords = valid_coords(game['dimensions'])
-    def check_victory():
-        for c in all_coords:
-            val, hidden = get_coord(game['board'], c), get_coord(game['hidden'], c)
-            if isinstance(val, int) and hidden:
-                return False
-        return True
-    
-    def dig_recursive(game, coord):
-        if get_coord(game['hidden'], coord) == False or game['state'] == 'defeat' \
-            or game['state'] == 'victory':
+    dimensions, board, hidden = game['dimensions'], game['board'], game['hidden']
+    def dig_iterative(coord):
+        if game['state'] == 'defeat' or game['state'] == 'victory' or \
+            not get_coord(hidden, coord):
             return 0
-        set_coord(game['hidden'], coord, False)
-        value =  get_coord(game['board'], coord)
-        if value == 0:
-            revealed, neighbors = 1, get_comrades(coord, game['dimensions'])
-            for n in neighbors:
-                revealed += dig_recursive(game, n)
-            return revealed
-        elif value == '.':
+        set_coord(hidden, coord, False)
+        value = get_coord(board, coord)
+        if value == '.':
             game['state'] = 'defeat'
             return 1
-        else:
-            return 1
-    
-
-    revealed = dig_recursive(game, coordinates)
-    if check_victory():
+        # stack of revealed squares with no adjacent bombs, still to expand
+        revealed, stack = 1, [coord] if value == 0 else []
+        while stack:
+            for n in get_comrades(stack.pop(), dimensions):
+                # descend both boards once, then work on the innermost lists
+                hidden_row, board_row = hidden, board
+                for i in n[:-1]:
+                    hidden_row, board_row = hidden_row[i], board_row[i]
+                last = n[-1]
+                if hidden_row[last]:
+                    hidden_row[last] = False
+                    revealed += 1
+                    if board_row[last] == 0:
+                        stack.append(n)
+        return revealed
+
+    revealed = dig_iterative(coordinates)
+    if game['state'] != 'defeat' and all_safe_revealed(board, hidden):
         game['state'] = 'victory'
         
     return revealed
         
 
 
-def render_nd(game, xray=False):
+def render_nd(game, xray=False, flat=False):
     """
     Prepare the game for display.
 
@@ -469,9 +541,12 @@ def render_nd(game, xray=False):
     Args:
        xray (bool): Whether to reveal all tiles or just the ones allowed by
                     game['hidden']
+       flat (bool): Whether to return one flat, row-major list of strings
+                    instead of nested lists
 
     Returns:
-       An n-dimensional array of strings (nested lists)
+       An n-dimensional array of strings (nested lists), or a flat list if
+       flat is True
 
     >>> g = {'dimensions': (2, 4, 2),
     ...      'board': [[[3, '.'], [3, 3], [1, 1], [0, 0]],
@@ -488,21 +563,14 @@ def render_nd(game, xray=False):
     >>> render_nd(g, True)
     [[['3', '.'], ['3', '3'], ['1', '1'], [' ', ' ']],
      [['.', '3'], ['3', '.'], ['1', '1'], [' ', ' ']]]
+
+    >>> render_nd(g, False, flat=True)
+    ['_', '_', '_', '3', '1', '1', ' ', ' ', '_', '_', '_', '_', '1', '1', ' ', ' ']
     """
-    res, valid = init_nested(game['dimensions'], 0), valid_coords(game['dimensions'])
-    
-    for c in valid:
-        val = str(get_coord(game['board'], c))
-        if val == '0':
-            val = ' '
-        if xray:
-            set_coord(res, c, val)
-        else:
-            if get_coord(game['hidden'], c):
-                set_coord(res, c, '_')
-            else:
-                set_coord(res, c, val)
-    return res
+    if flat:
+        return render_nested(flatten(game['board']), flatten(game['hidden']),
+                             xray)
+    return render_nested(game['board'], game['hidden'], xray)
 
 
 if __name__ == "__main__":
@@ -40,6 +40,11 @@ SPRITE_MAP = {
 
 STORM_LIGHTNING_ROUNDS = 5
 STORM_RAIN_ROUNDS = 10
+# rounds spent in each storm texture before switching to the other
+STORM_STATES = {'thunderstorm': STORM_LIGHTNING_ROUNDS, 'rainy': STORM_RAIN_ROUNDS}
+
+# player textures that never get bored
+VEHICLE_TEXTURES = {'helicopter', 'passenger_ship'}
 
 BEE_SPEED = 40
 CATERPILLAR_SPEED = 16
@@ -115,21 +120,36 @@ class Rectangle:
         """
         if not r2.intersects(r1):
             return None
-        # max distances to move in each dir
-        right, left, up, down = (r1.x+r1.w-r2.x, 0), (-(r2.x+r2.w-r1.x), 0), \
-            (0, r1.y+r1.h-r2.y), (0, -(r2.y+r2.h-r1.y))
-        moves = sorted([right, left, up, down], key=lambda pair:abs(pair[0])) 
-        return min(moves, key=lambda m: abs(m[0])+abs(m[1]))
+        # distances to move in each dir (all positive when overlapping)
+        right, left = r1.x+r1.w-r2.x, r2.x+r2.w-r1.x
+        up, down = r1.y+r1.h-r2.y, r2.y+r2.h-r1.y
+        shortest = min(right, left, up, down)
+        # ties go to vertical moves (horizontal component 0), then right
+        if up == shortest:
+            return (0, up)
+        if down == shortest:
+            return (0, -down)
+        if right == shortest:
+            return (right, 0)
+        return (-left, 0)
         
         
             
 
+def overlaps(ax, ay, asize, bx, by, bsize):
+    """
+    Same test as Rectangle.intersects, for two squares given by their
+    bottom-left corners and side lengths, without building Rectangles.
+    """
+    return ax < bx+bsize and bx < ax+asize and ay < by+bsize and by < ay+asize
+
+
 def get_tiles(lvl_map):
-    lvl_map.reverse()
-    width, height = len(lvl_map[0]), len(lvl_map)
-    for y in range(height):
-        for x in range(width):
-            yield lvl_map[y][x], x, y
+    # bottom row is y = 0; blank tiles hold no sprite, so skip them
+    for y, row in enumerate(reversed(lvl_map)):
+        for x, tile in enumerate(row):
+            if tile != ' ':
+                yield tile, x, y
     
 
 class Sprite:
@@ -147,16 +167,18 @@ class Dynam(Sprite):
         Sprite.__init__(self, x, y, texture)
         self.vx, self.vy = velocity
     
+    def accelerate(self, ax, ay):
+        """
+        Helper function for applying changes in velocity to dynamic sprites.
+        """
+        # cap Vy if current Vy + Ay exceeds max down velocity
+        self.vx, self.vy = (self.vx+ax, max(self.vy+ay, -MAX_DOWNWARD_SPEED))
+
     def move(self, ax, ay):
         """
         Helper function for applying changes in velocity and position to dynamic sprites.
         """ 
-        # cap Vy if current Vy + Ay exceeds max down velocity
-        if self.vy+ay < -MAX_DOWNWARD_SPEED:
-            self.vx, self.vy = (self.vx+ax, -MAX_DOWNWARD_SPEED)
-        else:
-            self.vx, self.vy = (self.vx+ax, self.vy+ay)
-        
+        self.accelerate(ax, ay)
         self.x, self.y = (self.x+self.vx, self.y+self.vy)
 
     def __str__(self):
@@ -177,23 +199,16 @@ class Player(Dynam):
         if self.vx < 0:
             self.vx += drag
         
-    def move(self, ax, ay):
+    def accelerate(self, ax, ay):
         """
-        Helper function for applying changes in velocity and position to dynamic sprites.
-        """ 
-        # cap Vy if current Vy + Ay exceeds max down velocity
-        if self.vy+ay < -MAX_DOWNWARD_SPEED:
-            self.vx, self.vy = (self.vx+ax, -MAX_DOWNWARD_SPEED)
-        else:
-            self.vx, self.vy = (self.vx+ax, self.vy+ay)
-            
+        Applies acceleration like any dynamic sprite, then drag and the
+        horizontal speed cap.
+        """
+        Dynam.accelerate(self, ax, ay)
         self.apply_drag()
         
         # cap Vx at max horizontal velocity after applying Ax + drag
-        self.vx = PLAYER_MAX_HORIZONTAL_SPEED if self.vx > PLAYER_MAX_HORIZONTAL_SPEED else self.vx
-        self.vx = -PLAYER_MAX_HORIZONTAL_SPEED if self.vx < -PLAYER_MAX_HORIZONTAL_SPEED else self.vx
-        
-        self.x, self.y = (self.x+self.vx, self.y+self.vy)
+        self.vx = max(-PLAYER_MAX_HORIZONTAL_SPEED, min(PLAYER_MAX_HORIZONTAL_SPEED, self.vx))
     
     def __str__(self):
         return f'Player({self.texture}: ({self.x}, {self.y}), {self.vy=}, {self.y=})'
@@ -224,32 +239,53 @@ class Game:
                 self.dynams.add(Dynam(x, y, ENEMIES[tile][0], ENEMIES[tile][1]))
             elif tile in SPRITE_MAP:
                 self.sprites.add(Sprite(x, y, SPRITE_MAP[tile]))
-            self.sprites.update(self.dynams)
-            self.sprites.update(self.storms)
+        self.sprites.update(self.dynams)
+        self.sprites.update(self.storms)
+
+        # static sprites never move, bin them once by the tile they occupy
+        # (and by column alone, for the horizontal slab render shows)
+        self.static_grid, self.static_columns = {}, {}
+        for s in self.sprites:
+            if not isinstance(s, Dynam):
+                self.static_grid.setdefault((s.x//TILE_SIZE, s.y//TILE_SIZE), []).append(s)
+                self.static_columns.setdefault(s.x//TILE_SIZE, []).append(s)
                 
-    def search_sprites(self):
-        yield from self.sprites
+    def search_grid(self, grid, d):
+        """
+        Yields sprites binned in `grid` by their bottom-left tile, for every
+        tile within one tile of the tiles dynamic sprite `d` overlaps.
+        """
+        tx, ty = d.x//TILE_SIZE, d.y//TILE_SIZE
+        for x in range(tx-1, tx+3):
+            for y in range(ty-1, ty+3):
+                yield from grid.get((x, y), ())
 
     def collisions(self, ind, type='static'):
         dynam_dead, static_dead = set(), set()
+        if type == 'static':
+            # every dynamic is checked, since they move during this pass
+            enemies = lambda d: self.dynams
+        else:
+            # nothing moves during a dynamic pass, so bin the dynamics once
+            dynam_grid = {}
+            for s in self.dynams:
+                dynam_grid.setdefault((s.x//TILE_SIZE, s.y//TILE_SIZE), []).append(s)
+            enemies = lambda d: self.search_grid(dynam_grid, d)
         for d in self.dynams:
-            dynam = Rectangle(d.x, d.y, d.size, d.size)
-            for s in self.search_sprites():
-                # dynamic-static
-                if type == 'static' and not (isinstance(s, Player) or isinstance(s, Dynam)):
-                    static = Rectangle(s.x, s.y, s.size, s.size)
-                    if dynam.intersects(static):
+            # dynamic-static
+            if type == 'static':
+                for s in self.search_grid(self.static_grid, d):
+                    if overlaps(d.x, d.y, d.size, s.x, s.y, s.size):
                         # end player jump hold: static col from above
                         if d is self.player and d.y >= s.y:
                             d.jump_hold[0] = False
 
-                        vec = static.translation_vector(dynam)
+                        static = Rectangle(s.x, s.y, s.size, s.size)
+                        vec = static.translation_vector(Rectangle(d.x, d.y, d.size, d.size))
                         dx, dy = vec
                         # only use hor/ver displ vectors
                         if vec[ind] == 0:
                             d.x, d.y = (d.x+dx, d.y+dy)
-                            dynam.x += dx
-                            dynam.y += dy
                             if d.texture == 'bee':
                                 d.vy = -d.vy
                             elif d.texture == 'caterpillar':
@@ -280,27 +316,30 @@ class Game:
                         elif d is self.player and s.texture == 'water_wave':
                             d.texture = 'passenger_ship'
 
-                # dynamic-dynamic
-                else:
-                    if isinstance(s, Dynam) and s is not self.player:
-                        enem = Rectangle(s.x, s.y, s.size, s.size)
-                        if dynam.intersects(enem):
-                            if d is self.player:
-                                # check for caterpillar collision from above
-                                vec = enem.translation_vector(dynam)
-                                dx, dy = vec
-                                if s.texture == 'caterpillar' and dx == 0 and dy > 0:
-                                    dynam_dead.add(s)
-                                # defeat check: player-dynamic enemy collision
-                                else:
-                                    self.status = 'defeat'
-                                    self.player.texture = 'injured'
-                            elif d.texture == 'fire' and s.texture == 'caterpillar':
+            # dynamic-dynamic
+            for s in enemies(d):
+                if s is not self.player:
+                    if overlaps(d.x, d.y, d.size, s.x, s.y, s.size):
+                        if d is self.player:
+                            # check for caterpillar collision from above
+                            enem = Rectangle(s.x, s.y, s.size, s.size)
+                            vec = enem.translation_vector(Rectangle(d.x, d.y, d.size, d.size))
+                            dx, dy = vec
+                            if s.texture == 'caterpillar' and dx == 0 and dy > 0:
                                 dynam_dead.add(s)
+                            # defeat check: player-dynamic enemy collision
+                            else:
+                                self.status = 'defeat'
+                                self.player.texture = 'injured'
+                        elif d.texture == 'fire' and s.texture == 'caterpillar':
+                            dynam_dead.add(s)
         # clear dead sprites after iteration
         self.dynams.difference_update(dynam_dead)
         self.sprites.difference_update(dynam_dead)         
         self.sprites.difference_update(static_dead)         
+        for s in static_dead:
+            self.static_grid[(s.x//TILE_SIZE, s.y//TILE_SIZE)].remove(s)
+            self.static_columns[s.x//TILE_SIZE].remove(s)
                     
     def timestep(self, keys):
         """
@@ -311,8 +350,7 @@ class Game:
             return
         
         # storm blinking
-        storm_states = {'thunderstorm': STORM_LIGHTNING_ROUNDS, 'rainy': STORM_RAIN_ROUNDS}
-        if self.storm[1]+1 < storm_states[self.storm[0]]:
+        if self.storm[1]+1 < STORM_STATES[self.storm[0]]:
                 self.storm[1] += 1
         else:
             self.storm = ['rainy', 0] if self.storm[0] == 'thunderstorm' else ['thunderstorm', 0]
@@ -325,7 +363,7 @@ class Game:
             self.bored = 0
             
         # no boredom if player is a choppa/ship
-        if self.player.texture != 'helicopter' and self.player.texture != 'passenger_ship':
+        if self.player.texture not in VEHICLE_TEXTURES:
             if self.bored > PLAYER_BORED_THRESHOLD:
                 self.player.texture = 'sleeping'
                 return
@@ -399,9 +437,9 @@ class Game:
         # horizontal
         self.collisions(1)
 
-        # dynamic-dynamic collision detection
+        # dynamic-dynamic collision detection: nothing moves and the axis is
+        # unused in this pass, so a second pass would only repeat the first
         self.collisions(0, 'dynamic')
-        self.collisions(1, 'dynamic')
 
             
         # defeat check
@@ -418,13 +456,14 @@ class Game:
         Report status and list of sprite dictionaries for sprites with a
         horizontal distance of w//2 from player. 
         """
-        window, px = [], self.player.x
-        # initialize rectangle centered on player
-        player = Rectangle(px-w//2, 0, w, h)
-        # search for in-frame sprites
-        for s in self.search_sprites():
-            sprite = Rectangle(s.x, s.y, s.size, s.size)
-            if player.intersects(sprite):
+        window, left = [], self.player.x-w//2
+        # candidates: statics in the columns the window spans, and dynamics
+        sprites = [s for x in range(left//TILE_SIZE, (left+w)//TILE_SIZE+1)
+                   for s in self.static_columns.get(x, ())]
+        sprites.extend(self.dynams)
+        # search for in-frame sprites: window centered on player
+        for s in sprites:
+            if left < s.x+s.size and s.x < left+w and 0 < s.y+s.size and s.y < h:
                 window.append({'texture': s.texture, 'pos': (s.x, s.y), 'player': isinstance(s, Player)})
         return (self.status, window)
 
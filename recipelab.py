@@ -29,14 +29,12 @@ def replace_item(recipes, old_name, new_name):
 def transform_data(recipes):
     # data representation: dict of food_name: cost for atomic ingredients &
     # food_name: [ingredient lists] for compounds
-    costs = { ingredient[1]: ingredient[2] for ingredient in recipes if \
-             ingredient[0] == 'atomic' }
-    compounds = [ ingredient for ingredient in recipes if ingredient[0] == 'compound' ]
-    for ingredient in compounds:
-        if ingredient[1] in costs: 
-            costs[ingredient[1]].append(ingredient[2])
+    costs = {}
+    for kind, name, payload in recipes:
+        if kind == 'atomic':
+            costs[name] = payload
         else:
-            costs[ingredient[1]] = [ ingredient[2] ]
+            costs.setdefault(name, []).append(payload)
     return costs
 
 def lowest_cost(recipes, food_item, excluded=[]):
@@ -44,9 +42,23 @@ def lowest_cost(recipes, food_item, excluded=[]):
     Given a recipes list and the name of a food item, return lowest cost of
     a full recipe for the given food item.
     """
-    costs = transform_data(recipes)
-   
+    return cheapest_cost(transform_data(recipes), food_item, excluded)
+
+
+def cheapest_cost(costs, food_item, excluded=[]):
+    """
+    Given already transformed recipe data (see transform_data), return lowest
+    cost of a full recipe for the given food item.
+    """
+    # each ingredient's lowest cost, computed once per call
+    memo = {}
+
     def lowest_cost(ingredient):
+        if ingredient not in memo:
+            memo[ingredient] = compute_lowest_cost(ingredient)
+        return memo[ingredient]
+
+    def compute_lowest_cost(ingredient):
         # base: not in recipe/in list of excluded ingredients
         if not ingredient in costs or ingredient in excluded:
             return None
@@ -76,34 +88,33 @@ def lowest_cost(recipes, food_item, excluded=[]):
 # Helpers
 
 def scale(flat_recipe, scalar):
-    result = { i: flat_recipe[i]*scalar for i in flat_recipe }
-    return result
+    return { i: amount*scalar for i, amount in flat_recipe.items() }
     
     
 def combine(flat_recipe_1, flat_recipe_2):
-    result = { i: flat_recipe_1[i] for i in flat_recipe_1 }
-    for i in flat_recipe_2:
-        if i in result:
-            result[i] += flat_recipe_2[i]
-        else:
-            result[i] = flat_recipe_2[i]
+    result = dict(flat_recipe_1)
+    for i, amount in flat_recipe_2.items():
+        result[i] = result.get(i, 0) + amount
     return result
 
 def compute_cost(flat_recipe, costs):
-    cost = sum([ costs[i]*flat_recipe[i] for i in flat_recipe ])
-    return cost
+    return sum([ costs[i]*amount for i, amount in flat_recipe.items() ])
     
 def create_combos(flats_list):
-    flats = []
     if not flats_list:
         return []
-    elif len(flats_list) == 1:
-        return flats_list[0]
-    else:
-        list_1, list_2 = flats_list[0], create_combos(flats_list[1:])
-        for elem_1 in list_1:
-            for elem_2 in list_2:
-                flats.append(combine(elem_1, elem_2))
+    # every way of picking one flat recipe per ingredient
+    picks = [()]
+    for options in flats_list:
+        picks = [ pick + (flat,) for pick in picks for flat in options ]
+    # merge each pick into a single flat recipe in one pass
+    flats = []
+    for pick in picks:
+        merged = {}
+        for flat in pick:
+            for i in flat:
+                merged[i] = merged.get(i, 0) + flat[i]
+        flats.append(merged)
     return flats
 
 def cheapest_flat_recipe(recipes, food_item, excluded=[]):
@@ -123,6 +134,8 @@ def cheapest_flat_recipe(recipes, food_item, excluded=[]):
                 return { food_item: 1 }
             else:
                 # recursive: search for a flat recipe across ingredient lists
+                # whose cost matches the cheapest possible for this food item
+                target = cheapest_cost(costs, food_item, excluded)
                 for variant in costs[food_item]:
                     # an ingredient is unavailable, skip
                     if [i[0] for i in variant if not i[0] in costs]:
@@ -132,14 +145,13 @@ def cheapest_flat_recipe(recipes, food_item, excluded=[]):
                     # attempt to create/scale flat recipe for each ingredient,
                     # combine w/ initial flat recipe
                     for i in variant:
-                        try:
-                            scaled = scale(cheapest_flat_recipe(i[0]), i[1])
-                            flat_recipe = combine(flat_recipe, scaled)
-                        # an ingredient cost returned none, skip
-                        except TypeError:
+                        sub_recipe = cheapest_flat_recipe(i[0])
+                        # no flat recipe for this ingredient, skip
+                        if sub_recipe is None:
                             continue
+                        flat_recipe = combine(flat_recipe, scale(sub_recipe, i[1]))
                     # if flat recipe creates cheapest sum, return
-                    if compute_cost(flat_recipe, costs) == lowest_cost(recipes, food_item, excluded):
+                    if compute_cost(flat_recipe, costs) == target:
                         return flat_recipe
                 # no cheapest flat recipe exists among combos, return None
                 return None
@@ -154,30 +166,34 @@ def all_flat_recipes(recipes, food_item, excluded=[]):
     """
     costs = transform_data(recipes)
     
-    def all_flat_recipes(food_item):
-        if not food_item in costs or food_item in excluded:
-            return []
+    # flat recipes per food item, filled in children-first off a work stack
+    flats, expanded, stack = {}, set(), [food_item]
+    while stack:
+        item = stack[-1]
+        if item in flats:
+            stack.pop()
+        elif not item in costs or item in excluded:
+            flats[stack.pop()] = []
+        elif isinstance(costs[item], (int, float)):
+            flats[stack.pop()] = [ {item: 1} ]
         else:
-            if isinstance(costs[food_item], (int, float)):
-                return [ {food_item: 1} ]
-            else:
-                all_flats_list = []
-                for variant in costs[food_item]:
-                    flat_recipes = []
-                    for ingred in variant:
-                        ingred_list, sub = [], all_flat_recipes(ingred[0])
-                        while sub:
-                            subflat = sub.pop()
-                            scaled = scale(subflat, ingred[1])
-                            flat = combine({}, scaled)
-                            ingred_list.append(flat)
-                        flat_recipes.append(ingred_list)
-                    all_flats_list.extend(create_combos(flat_recipes))
-                if all_flats_list:
-                    return all_flats_list
-                return []
-    
-    return all_flat_recipes(food_item)
+            pending = [ i[0] for variant in costs[item] for i in variant \
+                       if not i[0] in flats ]
+            if pending:
+                # ingredients still pending after their first visit: a cycle
+                if item in expanded:
+                    raise RecursionError(f'recipe for {item} contains itself')
+                expanded.add(item)
+                stack.extend(pending)
+                continue
+            all_flats_list = []
+            for variant in costs[item]:
+                flat_recipes = [ [ scale(flat, amount) for flat in flats[name] ] \
+                                for name, amount in variant ]
+                all_flats_list.extend(create_combos(flat_recipes))
+            flats[stack.pop()] = all_flats_list
+
+    return flats[food_item]
             
                 
 
@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 
-import sys
 import typing
 import doctest
+import functools
 
-sys.setrecursionlimit(10_000)
+# most unsatisfiable residual formulas remembered per solve
+FAILED_CACHE_SIZE = 1024
 
 def mod_formula(formula, var, truth):
     """
@@ -26,21 +27,79 @@ def mod_formula(formula, var, truth):
     [[], [('h', False), ('c', True)]]
     """
     new_formula = []
-    for clause in formula:        
-        # if literal containing var exists and truth value aligns, skip clause
-        if [literal for literal in clause if var in literal and literal[1] == truth]:
+    for clause in formula:
+        found_var = found_sat = False
+        for literal in clause:
+            if literal[0] == var:
+                found_var = True
+                # truth value aligns, clause is satisfied
+                if literal[1] == truth:
+                    found_sat = True
+                    break
+        if found_sat:
+            continue
+        # var absent, clause is unchanged (clauses are never mutated)
+        if not found_var:
+            new_formula.append(clause)
             continue
         # add clause to the formula w/o var (assume it evals to false)
-        else:
-            new_clause = [(literal[0], literal[1]) for literal in clause if var not in literal]
-            new_formula.append(new_clause)
+        new_formula.append([literal for literal in clause if literal[0] != var])
     return new_formula
 
-def get_unit_clause(formula):
+def intern_formula(formula):
+    """
+    Converts a CNF formula into a list of clauses, each a (pos, neg) pair of
+    bitmasks with one bit per variable. Returns the clauses and a dict mapping
+    each bit back to its variable.
+    """
+    bits, clauses = {}, []
     for clause in formula:
-        if len(clause) == 1:
-            return clause[0]
-    return None
+        pos = neg = 0
+        for var, truth in clause:
+            if var not in bits:
+                bits[var] = 1 << len(bits)
+            if truth:
+                pos |= bits[var]
+            else:
+                neg |= bits[var]
+        clauses.append((pos, neg))
+    return clauses, {bit: var for var, bit in bits.items()}
+
+def is_unit(pos, neg):
+    # exactly one literal, and not a variable in both polarities
+    return (pos | neg).bit_count() == 1 and not pos & neg
+
+def mod_clauses(clauses, bit, truth, units=None):
+    """
+    mod_formula over interned (pos, neg) clauses, assigning the variable with
+    the given bit.
+    """
+    new_clauses = []
+    for clause in clauses:
+        pos, neg = clause
+        # clause satisfied by the assignment, skip it
+        if (pos if truth else neg) & bit:
+            continue
+        # var absent, share the (immutable) clause with the new formula
+        if not (pos | neg) & bit:
+            new_clauses.append(clause)
+            continue
+        pos, neg = pos & ~bit, neg & ~bit
+        if units is not None and is_unit(pos, neg):
+            units.append((pos, True) if pos else (neg, False))
+        new_clauses.append((pos, neg))
+    return new_clauses
+
+def find_pure(clauses):
+    """
+    Returns masks of the variables occurring only positively and only
+    negatively across interned clauses.
+    """
+    pos_all = neg_all = 0
+    for pos, neg in clauses:
+        pos_all |= pos
+        neg_all |= neg
+    return pos_all & ~neg_all, neg_all & ~pos_all
 
 def satisfying_assignment(formula):
     """
@@ -55,42 +114,121 @@ def satisfying_assignment(formula):
     >>> satisfying_assignment([[('a', True)], [('a', False)]]) is None
     True
     """
-    assign, search = {}, True
-    while search:
-        search = False
-        for clause in formula:
-            if len(clause) == 1:
-                elem, truth = clause[0][0], clause[0][1]
-                formula = mod_formula(formula, elem, truth)
-                assign[elem] = truth
-                if not formula:
-                    return assign
-                if [] in formula:
-                    return None
-                search = True
-                break
-    if not formula:
-        return assign
-    else: 
-        var = formula[0][0][0]
-        for truth in (True, False):
-            f1 = mod_formula(formula, var, truth)
-            if [] in f1:
-                continue
-            assignment = satisfying_assignment(f1)
-            if assignment is not None: 
-                assign[var] = truth
-                return assign | assignment
+    clauses, names = intern_formula(formula)
+    assign = solve(clauses)
+    if assign is None:
         return None
-                
-    return satisfying_assignment(formula)
+    return {names[bit]: truth for bit, truth in assign.items()}
+
+def propagate(clauses, assign, trail):
+    """
+    Simplifies interned clauses by unit propagation and pure literal
+    elimination, recording every assignment made in assign and trail. Returns
+    the remaining clauses, or None if a clause was left empty.
+    """
+    if (0, 0) in clauses:
+        return None
+    # unit propagation: each assignment queues the unit clauses it creates
+    units = [(pos, True) if pos else (neg, False) for pos, neg in clauses \
+             if is_unit(pos, neg)]
+    while units:
+        bit, truth = units.pop()
+        if bit in assign:
+            # already assigned, a conflict would have emptied this clause
+            continue
+        clauses = mod_clauses(clauses, bit, truth, units)
+        assign[bit] = truth
+        trail.append(bit)
+        if (0, 0) in clauses:
+            return None
+    # pure literals: satisfy every clause they occur in, no branching needed
+    pure_pos, pure_neg = find_pure(clauses)
+    if pure_pos or pure_neg:
+        clauses = [clause for clause in clauses \
+                   if not (clause[0] & pure_pos or clause[1] & pure_neg)]
+        for mask, truth in ((pure_pos, True), (pure_neg, False)):
+            while mask:
+                bit = mask & -mask
+                assign[bit] = truth
+                trail.append(bit)
+                mask ^= bit
+    return clauses
+
+def choose_branch(clauses):
+    """
+    Picks the variable (bit) of nonempty interned clauses to branch on, and
+    the truth value to try first.
+    """
+    # Jeroslow-Wang over positive literals only: the many binary "not both"
+    # clauses would otherwise outweigh every positive occurrence, and guessing
+    # False only rules out one candidate at a time
+    score = {}
+    for pos, neg in clauses:
+        weight = 2.0 ** -(pos | neg).bit_count()
+        while pos:
+            bit = pos & -pos
+            score[bit] = score.get(bit, 0) + weight
+            pos ^= bit
+    positive = [clause for clause in clauses if clause[0]]
+    if not positive:
+        # only negative literals left, making any one False satisfies its clause
+        neg = clauses[0][1]
+        return neg & -neg, False
+    # branch in the shortest clause still needing a True literal, on its best
+    # scoring variable
+    pos, bits = min(positive, key=lambda c: (c[0] | c[1]).bit_count())[0], []
+    while pos:
+        bits.append(pos & -pos)
+        pos ^= bits[-1]
+    return max(bits, key=score.get), True
+
+def solve(clauses):
+    """
+    Finds a satisfying assignment (bit: truth) for interned clauses, or None.
+    """
+    # one assignment, undone back to a trail length when backtracking
+    assign, trail = {}, []
+    # residual formulas known to be unsatisfiable, least recently used first
+    failed = {}
+    # decisions: [key, clauses, trail length, bit, truths left to try]
+    stack = []
+    while True:
+        clauses = propagate(clauses, assign, trail)
+        if clauses is not None:
+            if not clauses:
+                return assign
+            key = frozenset(clauses)
+            if key in failed:
+                # refresh as most recently used
+                failed[key] = failed.pop(key)
+            else:
+                bit, first = choose_branch(clauses)
+                stack.append([key, clauses, len(trail), bit, [not first, first]])
+        # backtrack past decisions with no truth value left to try
+        while stack and not stack[-1][4]:
+            key = stack.pop()[0]
+            if len(failed) >= FAILED_CACHE_SIZE:
+                del failed[next(iter(failed))]
+            failed[key] = None
+        if not stack:
+            return None
+        _, parent, length, bit, truths = stack[-1]
+        for undone in trail[length:]:
+            del assign[undone]
+        del trail[length:]
+        truth = truths.pop()
+        assign[bit] = truth
+        trail.append(bit)
+        clauses = mod_clauses(parent, bit, truth)
         
+@functools.lru_cache(maxsize=None)
 def subgrids(n):
     """
-    Returns the coords in each of the the n subgrids as a list of lists of tuples
+    Returns the coords in each of the the n subgrids as a tuple of tuples of
+    tuples (cached, so shared between calls)
 
     >>> subgrids(4)
-    [[(0, 0), (0, 1), (1, 0), (1, 1)], [(0, 2), (0, 3), (1, 2), (1, 3)], [(2, 0), (2, 1), (3, 0), (3, 1)], [(2, 2), (2, 3), (3, 2), (3, 3)]]
+    (((0, 0), (0, 1), (1, 0), (1, 1)), ((0, 2), (0, 3), (1, 2), (1, 3)), ((2, 0), (2, 1), (3, 0), (3, 1)), ((2, 2), (2, 3), (3, 2), (3, 3)))
     """
     deg, subgrids = int(n**0.5), []
         
@@ -102,25 +240,26 @@ def subgrids(n):
             for i in range(istart, istop):
                 for j in range(jstart, jstop):
                     grid.append((i, j))
-            subgrids.append(grid)
+            subgrids.append(tuple(grid))
             jstart = jstop
         istart = istop
     
-    return subgrids
+    return tuple(subgrids)
     
             
+@functools.lru_cache(maxsize=None)
 def create_pairs(lst):
     """
-    Returns a set of all possible pairs of values in lst
+    Returns a frozenset of all possible pairs of values in the tuple lst
 
-    >>> create_pairs([1, 2, 3, 4, 5])
-    {(1, 2), (1, 3), (1, 4), (1, 5), (2, 3), (2, 4), (2, 5), (3, 4), (3, 5), (4, 5)}
+    >>> sorted(create_pairs((1, 2, 3, 4, 5)))
+    [(1, 2), (1, 3), (1, 4), (1, 5), (2, 3), (2, 4), (2, 5), (3, 4), (3, 5), (4, 5)]
     """
     pairs = set()
     for i in range(len(lst)-1):
         for j in range(i+1, len(lst)):
             pairs.add((lst[i], lst[j]))
-    return pairs
+    return frozenset(pairs)
          
 def sudoku_board_to_sat_formula(sudoku_board):
     """
@@ -131,47 +270,43 @@ def sudoku_board_to_sat_formula(sudoku_board):
     """
     n, formula = len(sudoku_board), []
     
-    digit_pairs = create_pairs(list(range(1, n+1)))
-    for i in range(n):
-        for j in range(n):
+    digits, indices = range(1, n+1), range(n)
+    # every negative literal built once and shared by all pairwise clauses
+    false = {(i, j, d): ((i, j, d), False) for i in indices for j in indices \
+             for d in digits}
+
+    digit_pairs = create_pairs(tuple(digits))
+    for i in indices:
+        for j in indices:
             num = sudoku_board[i][j]
             # sudoku cell != 0, add unit clause
             if num:
                 formula.append([((i, j, num), True)])
             # each cell must contain atleast 1 digit
-            c1 = [((i, j, d), True) for d in range(1, n+1)]
-            formula.append(c1)
+            formula.append([((i, j, d), True) for d in digits])
             # pairwise, atleast 1 digit must not be in current cell
-            for p in digit_pairs:
-                c2 = [((i, j, p[0]), False), ((i, j, p[1]), False)]
-                formula.append(c2)
+            formula.extend([[false[i, j, a], false[i, j, b]] for a, b in digit_pairs])
     
     
-    rowcol_pairs = create_pairs(list(range(n)))
-    for i in range(n):
+    rowcol_pairs = create_pairs(tuple(indices))
+    for i in indices:
         # each digit appears atleast 1x in every row, col
-        for d in range(1, n+1):
-            col = [((i, j, d), True) for j in range(n)]
-            row = [((j, i, d), True) for j in range(n)]
-            formula.extend([row, col])
+        for d in digits:
+            formula.append([((j, i, d), True) for j in indices])
+            formula.append([((i, j, d), True) for j in indices])
             # pairwise, atleast 1 cell must not contain digit (by row/col)
-            for p in rowcol_pairs:
-                    colpairwise = [((i, p[0], d), False), ((i, p[1], d), False)]
-                    rowpairwise = [((p[0], i, d), False), ((p[1], i, d), False)]
-                    formula.extend([rowpairwise, colpairwise])
+            formula.extend([[false[a, i, d], false[b, i, d]] for a, b in rowcol_pairs])
+            formula.extend([[false[i, a, d], false[i, b, d]] for a, b in rowcol_pairs])
     
     
-    subgrid_coords = subgrids(n)
-    for g in subgrid_coords:
-        subgrid_pairs = create_pairs(g)
+    for g in subgrids(n):
+        # pairs sharing a row or col are already covered above
+        subgrid_pairs = [ (a, b) for a, b in create_pairs(g) if a[0] != b[0] and a[1] != b[1] ]
         # each digit appears atleast 1x in the subgrid
-        for d in range(1, n+1):
-            c1 = [((c[0], c[1], d), True) for c in g]
-            formula.append(c1)
+        for d in digits:
+            formula.append([((i, j, d), True) for i, j in g])
             # pairwise, atleast 1 loc in subgrid must not contain digit
-            for p in subgrid_pairs:
-                subgridpairwise = [((p[0][0], p[0][1], d), False), ((p[1][0], p[1][1], d), False)]
-                formula.append(subgridpairwise)
+            formula.extend([[false[a + (d,)], false[b + (d,)]] for a, b in subgrid_pairs])
             
     return formula
 
@@ -194,13 +329,15 @@ def assignments_to_sudoku_board(assignments, n):
     """
     if assignments:
         board = [[0]*n for _ in range(n)]
+        # only (row, col, digit) variables inside the board are looked up
         for i in range(n):
             for j in range(n):
                 for d in range(1, n+1):
-                    if (i, j, d) in assignments and assignments[(i, j, d)]:
+                    if assignments.get((i, j, d)):
                         board[i][j] = d
-            if board[i][j] == 0:
-                return None
+        # any cell left without a digit, unsolveable
+        if any(0 in row for row in board):
+            return None
         return board
     return None
 
@@ -28,20 +28,25 @@ def new_game(level_description):
     ]
 
     """
-    internal = { 'wall': set(), 'computer': set(), 'target': set(), 'rows': len(level_description),
-                'player':set() }
+    static = { 'wall': set(), 'target': set(), 'rows': len(level_description) }
+    player, computers = None, set()
     for i in range(len(level_description)):
-        internal['cols'] = len(level_description[i])
+        static['cols'] = len(level_description[i])
         for j in range(len(level_description[i])):
             if 'wall' in level_description[i][j]:
-                internal['wall'].add((i, j))
+                static['wall'].add((i, j))
             if 'computer' in level_description[i][j]:
-                internal['computer'].add((i, j))
+                computers.add((i, j))
             if 'target' in level_description[i][j]:
-                internal['target'].add((i, j))
+                static['target'].add((i, j))
             if 'player' in level_description[i][j]:
-                internal['player'].add((i, j))
-    return internal, (frozenset(internal['computer']), frozenset(internal['player']))
+                player = (i, j)
+    # walls, targets & dimensions never change, shared by every later state
+    static['wall'], static['target'] = frozenset(static['wall']), frozenset(static['target'])
+    static['dead'] = dead_cells(static)
+    static['goal'] = static['target'] if static['target'] else None
+    # moving parts as one hashable state: (player location, computer locations)
+    return static, (player, frozenset(computers))
 
 
 def victory_check(game):
@@ -50,39 +55,27 @@ def victory_check(game):
     a Boolean: True if the given game satisfies the victory condition, and
     False otherwise.
     """
-    # Count computers and targets on board
-    c = len(game[0]['computer'])
-    t = len(game[0]['target'])
-    # Check for unequal/no computers and targets
-    if c != t or c == 0 or t == 0:
-        return False
-    else:
-        if game[0]['computer'] == game[0]['target']:
-            return True
-        return False
+    # every target covered by a computer (never met for a level w/o targets)
+    return game[1][1] == game[0]['goal']
             
 
 # Helper function for checking/moving valid steps across the board
-def move_valid_step(game, loc, step): 
-    newi, newj = step[0]+loc[0], step[1]+loc[1]
+def move_valid_step(walls, state, step): 
+    (i, j), computers = state
+    newi, newj = step[0]+i, step[1]+j
     # check for obstacle, no moves
-    if (newi, newj) in game['wall']:
-        return game
+    if (newi, newj) in walls:
+        return state
     # if no obstacles, check for further obstacles in that direction, move
-    elif (newi, newj) in game['computer']:
-        if (newi+step[0], newj+step[1]) not in game['wall'] and \
-            (newi+step[0], newj+step[1]) not in game['computer']:
-                game['player'].add((newi, newj))
-                game['player'].remove((loc[0], loc[1]))
-                game['computer'].remove((newi, newj))
-                game['computer'].add((newi+step[0], newj+step[1]))
-    else:
-        game['player'].add((newi, newj))
-        game['player'].remove((loc[0], loc[1]))
-    return game
+    if (newi, newj) in computers:
+        pushed = (newi+step[0], newj+step[1])
+        if pushed in walls or pushed in computers:
+            return state
+        return (newi, newj), computers - {(newi, newj)} | {pushed}
+    return (newi, newj), computers
 
 def get_loc(game):
-    return list(game[0]['player'])[0]
+    return game[1][0]
 
 def step_game(game, direction):
     """
@@ -93,16 +86,7 @@ def step_game(game, direction):
 
     This function should not mutate the input.
     """
-    # Copy current game representation
-    replica = { 'wall': game[0]['wall'].copy(), 'computer': game[0]['computer'].copy(), \
-           'target': game[0]['target'].copy(), 'rows': game[0]['rows'], 'cols': game[0]['cols'], \
-               'player': game[0]['player'].copy() }
-    step = direction_vector[direction]
-    # Get current player location
-    loc = get_loc(game)
-    # Check for valid step in given direction, update board
-    res = move_valid_step(replica, loc, step)
-    return res, (frozenset(res['computer']), frozenset(res['player']))
+    return game[0], move_valid_step(game[0]['wall'], game[1], direction_vector[direction])
             
 
 def dump_game(game):
@@ -112,33 +96,26 @@ def dump_game(game):
     (a list of lists of lists of strings).
 
     """
-    level_description = [ [ [] for j in range(game[0]['cols']) ] for i in range(game[0]['rows']) ]
-    elements = [elem for elem in game[0] if elem != 'rows' and elem != 'cols']
-    for elem in elements:
-        for i,j in game[0][elem]:
+    static, (player, computers) = game
+    level_description = [ [ [] for j in range(static['cols']) ] for i in range(static['rows']) ]
+    elements = [('wall', static['wall']), ('computer', computers), \
+                ('target', static['target']), ('player', (player,) if player else ())]
+    for elem, locs in elements:
+        for i,j in locs:
             level_description[i][j].append(elem)
     return level_description
 
-# Helper func, check if new possible computer postion is in a corner
-# def not_in_corner(game, newi, newj, step):
-#     # case: top left corner
-#     if 'wall' in game[newi+step[0]-1][newj+step[1]] and 'wall' in \
-#         game[newi+step[0]][newj+step[1]-1]:
-#         return False
-#     # case: top right corner
-#     elif 'wall' in game[newi+step[0]-1][newj+step[1]] and 'wall' in \
-#         game[newi+step[0]][newj+step[1]+1]:
-#             return False
-#     # case: bottom left corner
-#     elif 'wall' in game[newi+step[0]+1][newj+step[1]] and 'wall' in \
-#         game[newi+step[0]][newj+step[1]-1]:
-#             return False
-#     # case: bottom right corner
-#     elif 'wall' in game[newi+step[0]+1][newj+step[1]] and 'wall' in \
-#         game[newi+step[0]][newj+step[1]+1]:
-#             return False
-#     else:
-#         return True
+# Helper func, non-target cells in a corner: a computer pushed there is stuck
+def dead_cells(static):
+    walls, dead = static['wall'], set()
+    for i in range(static['rows']):
+        for j in range(static['cols']):
+            if (i, j) in walls or (i, j) in static['target']:
+                continue
+            if ((i-1, j) in walls or (i+1, j) in walls) and \
+                ((i, j-1) in walls or (i, j+1) in walls):
+                    dead.add((i, j))
+    return frozenset(dead)
 
 def solve_puzzle(game):
     """
@@ -153,20 +130,82 @@ def solve_puzzle(game):
     # base case: game satisfies victory check, return empty list (no moves)
     if victory_check(game):
         return []
-    agenda = [ ([], game) ]
-    visited = { game[1] }
-    while agenda:
-        this = agenda.pop(0)
-        sequence, board = this[0], this[1]
-        for d in direction_vector:
-            next_state = step_game(board, d)
-            if victory_check(next_state):
-                return sequence+[d]
-            if next_state[1] not in visited:
-                visited.add(next_state[1])
-                agenda.append((sequence+[d], next_state))
-    # no victory path found in agenda, return None
+    static, start = game
+    walls, targets, dead = static['wall'], static['target'], static['dead']
+    # computers are never created or destroyed, so they must match the targets
+    if not targets or len(start[1]) != len(targets):
+        return None
+    # search backwards from every winning state: targets covered, player free
+    goals = [ (i, j) for i in range(static['rows']) for j in range(static['cols']) \
+             if (i, j) not in walls and (i, j) not in targets ]
+    # bidirectional BFS: (neighbouring state, move) parents + frontier from each end
+    parents_fwd, parents_bwd = {start: None}, { (loc, targets): None for loc in goals }
+    frontier_fwd, frontier_bwd = [start], list(parents_bwd)
+    while frontier_fwd and frontier_bwd:
+        next_frontier = []
+        # expand whichever frontier is smaller by one full level
+        if len(frontier_fwd) <= len(frontier_bwd):
+            for state in frontier_fwd:
+                for d, step in direction_vector.items():
+                    next_state = move_valid_step(walls, state, step)
+                    # pushed a computer into a corner, level can't be won
+                    if next_state[1] is not state[1] and \
+                        (next_state[0][0]+step[0], next_state[0][1]+step[1]) in dead:
+                            continue
+                    if next_state not in parents_fwd:
+                        parents_fwd[next_state] = (state, d)
+                        # frontiers met, stitch both halves of the path together
+                        if next_state in parents_bwd:
+                            return join_moves(parents_fwd, parents_bwd, next_state)
+                        next_frontier.append(next_state)
+            frontier_fwd = next_frontier
+        else:
+            for state in frontier_bwd:
+                for prev_state, d in reverse_steps(walls, state):
+                    if prev_state not in parents_bwd:
+                        parents_bwd[prev_state] = (state, d)
+                        if prev_state in parents_fwd:
+                            return join_moves(parents_fwd, parents_bwd, prev_state)
+                        next_frontier.append(prev_state)
+            frontier_bwd = next_frontier
+    # no victory path found, return None
     return None
+
+
+def reverse_steps(walls, state):
+    """
+    Returns (previous state, direction) for every state that becomes the given
+    state after one step in that direction.
+    """
+    (i, j), computers = state
+    steps = []
+    for d, (di, dj) in direction_vector.items():
+        prev = (i-di, j-dj)
+        if prev in walls or prev in computers:
+            continue
+        steps.append(((prev, computers), d))
+        # the step may also have pushed the computer now just ahead
+        pushed = (i+di, j+dj)
+        if pushed in computers:
+            steps.append(((prev, computers - {pushed} | {(i, j)}), d))
+    return steps
+
+
+def trace_moves(parents, state):
+    # follow parent pointers from state back to the root of its search
+    moves = []
+    while parents[state] is not None:
+        state, d = parents[state]
+        moves.append(d)
+    return moves
+
+
+def join_moves(parents_fwd, parents_bwd, meet):
+    # start -> meeting state (reversed), then meeting state -> victory
+    moves = trace_moves(parents_fwd, meet)
+    moves.reverse()
+    moves.extend(trace_moves(parents_bwd, meet))
+    return moves
     
 
 